@@ -3,10 +3,11 @@
 负责管理和跟踪PostgreSQL事务的状态和操作
 """
 
-from typing import Dict, List, Optional, Set, Any
-from dataclasses import dataclass, field
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Any
 from enum import Enum
-from core.wal_parser import XLogRecord, get_rmgr_name
+from core.wal_parser import XLogRecord
+from utils.lsn_utils import LSN
 
 
 class TransactionState(Enum):
@@ -19,19 +20,79 @@ class TransactionState(Enum):
     PREPARED = "prepared"
 
 
-@dataclass
+# Transaction资源管理器ID
+_TRANSACTION_RMID = 1
+
+# 仍处于活跃状态（未提交也未回滚）的事务状态
+_ACTIVE_STATES = frozenset((TransactionState.IN_PROGRESS, TransactionState.PREPARED))
+
+
 class TransactionInfo:
     """
     事务信息类
     """
-    xid: int                                          # 事务ID
-    state: TransactionState = TransactionState.IN_PROGRESS  # 事务状态
-    start_lsn: Optional[str] = None                   # 开始LSN
-    commit_lsn: Optional[str] = None                  # 提交LSN
-    records: List[XLogRecord] = field(default_factory=list)  # 事务包含的记录
-    savepoints: List[int] = field(default_factory=list)     # 保存点列表
-    subtransactions: Set[int] = field(default_factory=set)  # 子事务集合
-    parent_xid: Optional[int] = None                  # 父事务ID
+    
+    __slots__ = ('xid', 'state', 'start_lsn', 'commit_lsn', 'records', 'savepoints',
+                 'subtransactions', 'subtransaction_objs', 'parent_xid')
+    
+    def __init__(self, xid: int, state: TransactionState = TransactionState.IN_PROGRESS,
+                 start_lsn: Optional[int] = None, commit_lsn: Optional[int] = None,
+                 records: Optional[List[XLogRecord]] = None, savepoints: Optional[List[int]] = None,
+                 subtransactions: Optional[Set[int]] = None,
+                 subtransaction_objs: Optional[List['TransactionInfo']] = None,
+                 parent_xid: Optional[int] = None):
+        self.xid = xid                                    # 事务ID
+        self.state = state                                # 事务状态
+        self.start_lsn = start_lsn                        # 开始LSN（原始64位值）
+        self.commit_lsn = commit_lsn                      # 提交LSN（原始64位值）
+        self.records = [] if records is None else records  # 事务包含的记录
+        self.savepoints = [] if savepoints is None else savepoints  # 保存点列表
+        self.subtransactions = set() if subtransactions is None else subtransactions  # 子事务集合
+        # 子事务对象，用于提交/回滚级联
+        self.subtransaction_objs = [] if subtransaction_objs is None else subtransaction_objs
+        self.parent_xid = parent_xid                      # 父事务ID
+    
+    # 参与比较和显示的字段；subtransaction_objs由subtransactions派生，不参与
+    _FIELDS = ('xid', 'state', 'start_lsn', 'commit_lsn', 'records', 'savepoints',
+               'subtransactions', 'parent_xid')
+    
+    def __repr__(self) -> str:
+        """
+        按字段生成表示字符串
+        """
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._FIELDS)
+        return f"{type(self).__name__}({fields})"
+    
+    def __eq__(self, other: object) -> bool:
+        """
+        同类型且各字段相等时相等
+        """
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._FIELDS)
+    
+    # 定义了__eq__的可变对象不可哈希
+    __hash__ = None
+    
+    @property
+    def start_lsn_str(self) -> Optional[str]:
+        """
+        获取字符串格式的开始LSN
+        
+        Returns:
+            如"0/16B37B0"格式的LSN，未设置时返回None
+        """
+        return None if self.start_lsn is None else str(LSN(self.start_lsn))
+    
+    @property
+    def commit_lsn_str(self) -> Optional[str]:
+        """
+        获取字符串格式的提交LSN
+        
+        Returns:
+            如"0/16B37B0"格式的LSN，未设置时返回None
+        """
+        return None if self.commit_lsn is None else str(LSN(self.commit_lsn))
     
     def add_record(self, record: XLogRecord):
         """
@@ -82,15 +143,30 @@ class TransactionManager:
         """
         初始化事务管理器
         """
-        self.transactions: Dict[int, TransactionInfo] = {}  # 活跃事务
-        self.committed_transactions: Dict[int, TransactionInfo] = {}  # 已提交事务
-        self.aborted_transactions: Dict[int, TransactionInfo] = {}  # 已回滚事务
+        # 所有事务，由TransactionInfo.state区分活跃/已提交/已回滚
+        self.transactions: Dict[int, TransactionInfo] = {}
+        # 同一xid又出现新事务时，被取代的已结束事务按状态保存在这里
+        self._retired_transactions: Dict[TransactionState, Dict[int, TransactionInfo]] = {
+            TransactionState.COMMITTED: {},
+            TransactionState.ABORTED: {},
+        }
         self.subtransaction_map: Dict[int, int] = {}  # 子事务到父事务的映射
         
         # 统计信息
         self.total_transactions = 0
         self.committed_count = 0
         self.aborted_count = 0
+        
+        # 事务记录info到处理函数的分发表
+        self._xact_dispatch = {
+            0x00: self._commit_transaction,               # XLOG_XACT_COMMIT
+            0x10: self._abort_transaction,                # XLOG_XACT_ABORT
+            0x20: self._prepare_transaction,              # XLOG_XACT_PREPARE
+            0x30: self._commit_prepared_transaction,      # XLOG_XACT_COMMIT_PREPARED
+            0x40: self._abort_prepared_transaction,       # XLOG_XACT_ABORT_PREPARED
+            0x50: lambda xid, record: self._process_assignment(record),  # XLOG_XACT_ASSIGNMENT
+            0x60: lambda xid, record: self._process_invalid(record),     # XLOG_XACT_INVALID
+        }
     
     def process_record(self, record: XLogRecord):
         """
@@ -99,15 +175,48 @@ class TransactionManager:
         Args:
             record: XLOG记录
         """
-        rmgr_name = get_rmgr_name(record.xl_rmid)
-        
         # 处理事务相关的记录
-        if rmgr_name == 'Transaction':
+        if record.xl_rmid == _TRANSACTION_RMID:
             self._process_transaction_record(record)
         elif record.xl_xid != 0:
             # 处理其他事务记录
             self._process_general_record(record)
     
+    def process_all(self, records: Iterable[XLogRecord], xids: Optional[Sequence[int]] = None):
+        """
+        批量处理XLOG记录
+        
+        同一事务的记录在WAL中通常是连续的，因此对连续相同xid的一段记录只查找一次事务，
+        其余记录直接追加，处理顺序与逐条调用process_record完全一致。
+        
+        records只遍历一遍；传入生成器等迭代器时会被耗尽，调用方之后无法再次使用，
+        需要重复使用时请传入列表。
+        
+        Args:
+            records: XLOG记录序列或可迭代对象
+            xids: 与records一一对应的事务ID序列（如WALFile.xid_array），省略时从记录中读取
+        """
+        if xids is None:
+            pairs = ((record.xl_xid, record) for record in records)
+        else:
+            pairs = zip(xids, records)
+        
+        current_xid = 0
+        append_current = None  # 当前事务records列表的append方法
+        
+        for xid, record in pairs:
+            if record.xl_rmid == _TRANSACTION_RMID:
+                self._process_transaction_record(record)
+                # 事务可能已结束，下一条记录需要重新查找活跃事务
+                current_xid = 0
+            elif xid != 0:
+                if xid == current_xid:
+                    append_current(record)
+                else:
+                    self._process_general_record(record)
+                    current_xid = xid
+                    append_current = self.transactions[xid].records.append
+    
     def _process_transaction_record(self, record: XLogRecord):
         """
         处理事务管理器记录
@@ -115,23 +224,11 @@ class TransactionManager:
         Args:
             record: 事务记录
         """
-        info = record.get_info()
-        xid = record.xl_xid
+        info = record.info
         
-        if info == 0x00:  # XLOG_XACT_COMMIT
-            self._commit_transaction(xid, record)
-        elif info == 0x10:  # XLOG_XACT_ABORT
-            self._abort_transaction(xid, record)
-        elif info == 0x20:  # XLOG_XACT_PREPARE
-            self._prepare_transaction(xid, record)
-        elif info == 0x30:  # XLOG_XACT_COMMIT_PREPARED
-            self._commit_prepared_transaction(xid, record)
-        elif info == 0x40:  # XLOG_XACT_ABORT_PREPARED
-            self._abort_prepared_transaction(xid, record)
-        elif info == 0x50:  # XLOG_XACT_ASSIGNMENT
-            self._process_assignment(record)
-        elif info == 0x60:  # XLOG_XACT_INVALID
-            self._process_invalid(record)
+        handler = self._xact_dispatch.get(info)
+        if handler is not None:
+            handler(record.xl_xid, record)
         else:
             # 其他事务记录类型
             self._process_other_transaction_record(record, info)
@@ -145,30 +242,62 @@ class TransactionManager:
         """
         xid = record.xl_xid
         
-        # 如果事务不存在，创建新事务
-        if xid not in self.transactions:
+        transaction = self._get_active_transaction(xid)
+        if transaction is None:
+            # 没有活跃事务时创建新事务，创建时已包含本条记录
             self._create_transaction(xid, record)
+            return
         
         # 添加记录到事务
-        if xid in self.transactions:
-            self.transactions[xid].add_record(record)
+        transaction.add_record(record)
     
-    def _create_transaction(self, xid: int, record: XLogRecord):
+    def _create_transaction(self, xid: int, record: XLogRecord) -> TransactionInfo:
         """
         创建新事务
         
         Args:
             xid: 事务ID
             record: XLOG记录
+            
+        Returns:
+            新创建的事务信息，已包含该记录
         """
+        self._retire_transaction(xid)
         transaction = TransactionInfo(
             xid=xid,
-            start_lsn=str(record.xl_prev)
+            start_lsn=record.xl_prev_raw
         )
-        transaction.add_record(record)
-        
         self.transactions[xid] = transaction
         self.total_transactions += 1
+        
+        transaction.add_record(record)
+        return transaction
+    
+    def _retire_transaction(self, xid: int):
+        """
+        同一xid将创建新事务前，把已结束的旧事务移出活跃位置
+        
+        Args:
+            xid: 事务ID
+        """
+        transaction = self.transactions.get(xid)
+        if transaction is not None and transaction.state not in _ACTIVE_STATES:
+            self._retired_transactions[transaction.state][xid] = transaction
+    
+    def _get_active_transaction(self, xid: int) -> Optional[TransactionInfo]:
+        """
+        获取仍处于活跃状态的事务
+        
+        Args:
+            xid: 事务ID
+            
+        Returns:
+            活跃事务信息，不存在或已结束时返回None
+        """
+        transaction = self.transactions.get(xid)
+        if transaction is not None and transaction.state in _ACTIVE_STATES:
+            return transaction
+        return None
     
     def _commit_transaction(self, xid: int, record: XLogRecord):
         """
@@ -178,25 +307,21 @@ class TransactionManager:
             xid: 事务ID
             record: XLOG记录
         """
-        if xid in self.transactions:
-            transaction = self.transactions[xid]
+        transaction = self._get_active_transaction(xid)
+        if transaction is not None:
             transaction.state = TransactionState.COMMITTED
-            transaction.commit_lsn = str(record.xl_prev)
+            transaction.commit_lsn = record.xl_prev_raw
             transaction.add_record(record)
-            
-            # 移动到已提交事务
-            self.committed_transactions[xid] = transaction
-            del self.transactions[xid]
             self.committed_count += 1
             
             # 处理子事务
-            for subxid in transaction.subtransactions:
-                if subxid in self.transactions:
-                    subtransaction = self.transactions[subxid]
+            for subtransaction in transaction.subtransaction_objs:
+                if subtransaction.state not in _ACTIVE_STATES:
+                    # 子事务已结束且xid又被新事务使用时，处理当前活跃的那个
+                    subtransaction = self._get_active_transaction(subtransaction.xid)
+                if subtransaction is not None:
                     subtransaction.state = TransactionState.COMMITTED
-                    subtransaction.commit_lsn = str(record.xl_prev)
-                    self.committed_transactions[subxid] = subtransaction
-                    del self.transactions[subxid]
+                    subtransaction.commit_lsn = transaction.commit_lsn
     
     def _abort_transaction(self, xid: int, record: XLogRecord):
         """
@@ -206,25 +331,21 @@ class TransactionManager:
             xid: 事务ID
             record: XLOG记录
         """
-        if xid in self.transactions:
-            transaction = self.transactions[xid]
+        transaction = self._get_active_transaction(xid)
+        if transaction is not None:
             transaction.state = TransactionState.ABORTED
-            transaction.commit_lsn = str(record.xl_prev)
+            transaction.commit_lsn = record.xl_prev_raw
             transaction.add_record(record)
-            
-            # 移动到已回滚事务
-            self.aborted_transactions[xid] = transaction
-            del self.transactions[xid]
             self.aborted_count += 1
             
             # 处理子事务
-            for subxid in transaction.subtransactions:
-                if subxid in self.transactions:
-                    subtransaction = self.transactions[subxid]
+            for subtransaction in transaction.subtransaction_objs:
+                if subtransaction.state not in _ACTIVE_STATES:
+                    # 子事务已结束且xid又被新事务使用时，处理当前活跃的那个
+                    subtransaction = self._get_active_transaction(subtransaction.xid)
+                if subtransaction is not None:
                     subtransaction.state = TransactionState.ABORTED
-                    subtransaction.commit_lsn = str(record.xl_prev)
-                    self.aborted_transactions[subxid] = subtransaction
-                    del self.transactions[subxid]
+                    subtransaction.commit_lsn = transaction.commit_lsn
     
     def _prepare_transaction(self, xid: int, record: XLogRecord):
         """
@@ -234,8 +355,8 @@ class TransactionManager:
             xid: 事务ID
             record: XLOG记录
         """
-        if xid in self.transactions:
-            transaction = self.transactions[xid]
+        transaction = self._get_active_transaction(xid)
+        if transaction is not None:
             transaction.state = TransactionState.PREPARED
             transaction.add_record(record)
     
@@ -247,8 +368,7 @@ class TransactionManager:
             xid: 事务ID
             record: XLOG记录
         """
-        if xid in self.transactions:
-            self._commit_transaction(xid, record)
+        self._commit_transaction(xid, record)
     
     def _abort_prepared_transaction(self, xid: int, record: XLogRecord):
         """
@@ -258,8 +378,7 @@ class TransactionManager:
             xid: 事务ID
             record: XLOG记录
         """
-        if xid in self.transactions:
-            self._abort_transaction(xid, record)
+        self._abort_transaction(xid, record)
     
     def _process_assignment(self, record: XLogRecord):
         """
@@ -290,10 +409,11 @@ class TransactionManager:
         """
         xid = record.xl_xid
         
-        if xid not in self.transactions:
+        transaction = self._get_active_transaction(xid)
+        if transaction is None:
             self._create_transaction(xid, record)
         else:
-            self.transactions[xid].add_record(record)
+            transaction.add_record(record)
     
     def get_transaction(self, xid: int) -> Optional[TransactionInfo]:
         """
@@ -305,19 +425,11 @@ class TransactionManager:
         Returns:
             事务信息
         """
-        # 在活跃事务中查找
-        if xid in self.transactions:
-            return self.transactions[xid]
-        
-        # 在已提交事务中查找
-        if xid in self.committed_transactions:
-            return self.committed_transactions[xid]
-        
-        # 在已回滚事务中查找
-        if xid in self.aborted_transactions:
-            return self.aborted_transactions[xid]
-        
-        return None
+        transaction = self.transactions.get(xid)
+        if transaction is None or transaction.state is not TransactionState.ABORTED:
+            return transaction
+        # 已回滚时，同一xid可能还有更早的已提交事务，优先返回
+        return self._retired_transactions[TransactionState.COMMITTED].get(xid, transaction)
     
     def get_active_transactions(self) -> Dict[int, TransactionInfo]:
         """
@@ -326,7 +438,7 @@ class TransactionManager:
         Returns:
             活跃事务字典
         """
-        return self.transactions.copy()
+        return {xid: t for xid, t in self.transactions.items() if t.state in _ACTIVE_STATES}
     
     def get_committed_transactions(self) -> Dict[int, TransactionInfo]:
         """
@@ -335,7 +447,7 @@ class TransactionManager:
         Returns:
             已提交事务字典
         """
-        return self.committed_transactions.copy()
+        return self._transactions_in_state(TransactionState.COMMITTED)
     
     def get_aborted_transactions(self) -> Dict[int, TransactionInfo]:
         """
@@ -344,12 +456,28 @@ class TransactionManager:
         Returns:
             已回滚事务字典
         """
-        return self.aborted_transactions.copy()
+        return self._transactions_in_state(TransactionState.ABORTED)
+    
+    def _transactions_in_state(self, state: TransactionState) -> Dict[int, TransactionInfo]:
+        """
+        获取处于指定状态的事务
+        
+        Args:
+            state: 事务状态
+            
+        Returns:
+            事务字典
+        """
+        transactions = self._retired_transactions[state].copy()
+        transactions.update((xid, t) for xid, t in self.transactions.items() if t.state is state)
+        return transactions
     
     def get_transaction_records(self, xid: int) -> List[XLogRecord]:
         """
         获取事务的所有记录
         
+        直接返回事务内部的记录列表而不做拷贝，调用方如需修改请自行copy()
+        
         Args:
             xid: 事务ID
             
@@ -357,21 +485,21 @@ class TransactionManager:
             记录列表
         """
         transaction = self.get_transaction(xid)
-        if transaction:
-            return transaction.records.copy()
+        if transaction is not None:
+            return transaction.records
         return []
     
-    def get_committed_records(self) -> List[XLogRecord]:
+    def get_committed_records(self) -> Iterator[XLogRecord]:
         """
         获取所有已提交事务的记录
         
+        返回惰性迭代器而非列表，需要列表时请调用方自行list()
+        
         Returns:
-            记录列表
+            记录迭代器
         """
-        records = []
-        for transaction in self.committed_transactions.values():
-            records.extend(transaction.records)
-        return records
+        committed = self._transactions_in_state(TransactionState.COMMITTED)
+        return chain.from_iterable(transaction.records for transaction in committed.values())
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -382,7 +510,7 @@ class TransactionManager:
         """
         return {
             'total_transactions': self.total_transactions,
-            'active_count': len(self.transactions),
+            'active_count': sum(1 for t in self.transactions.values() if t.state in _ACTIVE_STATES),
             'committed_count': self.committed_count,
             'aborted_count': self.aborted_count,
             'committed_transactions': self.committed_count,
@@ -394,8 +522,8 @@ class TransactionManager:
         重置事务管理器状态
         """
         self.transactions.clear()
-        self.committed_transactions.clear()
-        self.aborted_transactions.clear()
+        for retired in self._retired_transactions.values():
+            retired.clear()
         self.subtransaction_map.clear()
         self.total_transactions = 0
         self.committed_count = 0
@@ -411,17 +539,20 @@ class TransactionManager:
         """
         self.subtransaction_map[subxid] = parent_xid
         
-        # 如果父事务存在，添加子事务
-        if parent_xid in self.transactions:
-            self.transactions[parent_xid].add_subtransaction(subxid)
-        
-        # 创建子事务
-        if subxid not in self.transactions:
+        # 创建子事务，已存在的子事务保持原样
+        subtransaction = self.transactions.get(subxid)
+        if subtransaction is None:
             subtransaction = TransactionInfo(
                 xid=subxid,
                 parent_xid=parent_xid
             )
             self.transactions[subxid] = subtransaction
+        
+        # 如果父事务存在，添加子事务并保存子事务对象，提交时无需再查找
+        parent = self.transactions.get(parent_xid)
+        if parent is not None and subxid not in parent.subtransactions:
+            parent.add_subtransaction(subxid)
+            parent.subtransaction_objs.append(subtransaction)
     
     def get_parent_transaction(self, subxid: int) -> Optional[int]:
         """
@@ -445,7 +576,7 @@ class TransactionManager:
         Returns:
             如果事务活跃返回True
         """
-        return xid in self.transactions
+        return self._get_active_transaction(xid) is not None
     
     def is_transaction_committed(self, xid: int) -> bool:
         """
@@ -457,7 +588,7 @@ class TransactionManager:
         Returns:
             如果事务已提交返回True
         """
-        return xid in self.committed_transactions
+        return self._is_transaction_in_state(xid, TransactionState.COMMITTED)
     
     def is_transaction_aborted(self, xid: int) -> bool:
         """
@@ -469,4 +600,20 @@ class TransactionManager:
         Returns:
             如果事务已回滚返回True
         """
-        return xid in self.aborted_transactions
\ No newline at end of file
+        return self._is_transaction_in_state(xid, TransactionState.ABORTED)
+    
+    def _is_transaction_in_state(self, xid: int, state: TransactionState) -> bool:
+        """
+        检查事务是否处于指定的结束状态
+        
+        Args:
+            xid: 事务ID
+            state: 事务状态
+            
+        Returns:
+            当前或被取代的同一xid事务处于该状态时返回True
+        """
+        transaction = self.transactions.get(xid)
+        if transaction is not None and transaction.state is state:
+            return True
+        return xid in self._retired_transactions[state]
\ No newline at end of file
@@ -3,18 +3,138 @@ WAL文件解析核心模块
 负责解析PostgreSQL WAL文件的格式和结构
 """
 
+import mmap
+import os
 import struct
-from typing import Dict, Any, Optional, List
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing.util import Finalize
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, Optional, List, Tuple
 from utils.binary_reader import BinaryReader
+from utils.crc32c import crc32c
 from utils.lsn_utils import LSN
 
 
+# XLogRecord固定头部格式: xl_tot_len, xl_xid, xl_prev, xl_info, xl_rmid, 2字节填充, xl_crc
+_XLOG_HDR = struct.Struct('<IIQBBxxI')
+_XLOG_HDR_SIZE = _XLOG_HDR.size
+
+# 记录数据部分使用的预编译格式
+_BLK_HDR = struct.Struct('<BBH')     # 块ID, fork_flags, data_length
+_REL = struct.Struct('<III')         # spcNode, dbNode, relNode
+_BIMG = struct.Struct('<HHB')        # length, hole_offset, bimg_info
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+
+
+def _read_slice(buf, pos: int, count: int) -> bytes:
+    """
+    从缓冲区中截取指定长度的字节
+    
+    Raises:
+        EOFError: 如果超出缓冲区末尾
+    """
+    end = pos + count
+    if end > len(buf):
+        raise EOFError(f"尝试读取{count}字节，但只剩{len(buf) - pos}字节")
+    return bytes(buf[pos:end])
+
+
+class RelFileNode:
+    """
+    关系文件节点
+    对应PostgreSQL源码中的RelFileNode结构
+    """
+    
+    __slots__ = ('spcNode', 'dbNode', 'relNode')
+    
+    def __init__(self, spc_node: int, db_node: int, rel_node: int):
+        self.spcNode = spc_node    # 表空间OID
+        self.dbNode = db_node      # 数据库OID
+        self.relNode = rel_node    # 关系文件节点号
+
+
+class BlockImage:
+    """
+    块引用中的整页镜像
+    """
+    
+    __slots__ = ('length', 'hole_offset', 'bimg_info', 'hole_length', 'data')
+    
+    def __init__(self, length: int, hole_offset: int, bimg_info: int):
+        self.length = length
+        self.hole_offset = hole_offset
+        self.bimg_info = bimg_info
+        self.hole_length = None    # 仅在有空洞且压缩时存在
+        self.data = b''
+    
+    @property
+    def has_hole(self) -> bool:
+        """镜像中是否有空洞"""
+        return bool(self.bimg_info & 0x01)
+    
+    @property
+    def should_apply(self) -> bool:
+        """重放时是否应用镜像"""
+        return bool(self.bimg_info & 0x02)
+
+
+class BlockRef:
+    """
+    XLOG记录中的块引用
+    对应PostgreSQL源码中的XLogRecordBlockHeader及其后续数据
+    """
+    
+    __slots__ = ('id', 'fork_flags', 'data_length', 'image', 'relfilenode', 'block_num', 'data')
+    
+    def __init__(self, block_id: int, fork_flags: int, data_length: int):
+        self.id = block_id
+        self.fork_flags = fork_flags
+        self.data_length = data_length
+        self.image: Optional[BlockImage] = None          # 页面镜像
+        self.relfilenode: Optional[RelFileNode] = None   # 与上一个块相同关系时为None
+        self.block_num = 0
+        self.data: Optional[bytes] = None                # 块数据
+    
+    @property
+    def has_image(self) -> bool:
+        """是否包含页面镜像"""
+        return bool(self.fork_flags & 0x10)
+    
+    @property
+    def has_data(self) -> bool:
+        """是否包含块数据"""
+        return bool(self.fork_flags & 0x20)
+    
+    @property
+    def will_init(self) -> bool:
+        """重放时是否初始化页面"""
+        return bool(self.fork_flags & 0x40)
+    
+    @property
+    def same_rel(self) -> bool:
+        """是否与上一个块引用属于同一关系"""
+        return bool(self.fork_flags & 0x80)
+    
+    @property
+    def fork_num(self) -> int:
+        """分支号"""
+        return self.fork_flags & 0x0F
+
+
 class XLogRecord:
     """
     XLOG记录结构体
     对应PostgreSQL源码中的XLogRecord结构
     """
     
+    __slots__ = ('xl_tot_len', 'xl_xid', 'xl_prev_raw', '_xl_prev', 'xl_info',
+                 'xl_rmid', 'xl_crc', 'info', 'rmgr_info', 'blocks', 'main_data',
+                 '_payload_parsed')
+    
     # 常量定义
     SIZEOF_XLOG_RECORD = 24  # offsetof(XLogRecord, xl_crc) + sizeof(pg_crc32c)
     
@@ -24,163 +144,212 @@ class XLogRecord:
     XLR_SPECIAL_REL_UPDATE = 0x01
     XLR_CHECK_CONSISTENCY = 0x02
     
-    def __init__(self, reader: BinaryReader):
+    def __init__(self, buf, pos: int = 0, parse_payload: bool = True):
         """
         从二进制数据中解析XLOG记录
         
         Args:
-            reader: 二进制数据读取器
-        """
-        self.xl_tot_len = reader.read_uint32()      # total len of entire record
-        self.xl_xid = reader.read_uint32()          # xact id
-        xl_prev_value = reader.read_uint64()        # ptr to previous record in log
-        self.xl_prev = LSN(xl_prev_value)
-        self.xl_info = reader.read_uint8()          # flag bits
-        self.xl_rmid = reader.read_uint8()          # resource manager for this record
-        reader.skip_bytes(2)                        # 2 bytes of padding
-        self.xl_crc = reader.read_uint32()          # CRC for this record
+            buf: 包含记录的缓冲区（bytes或memoryview）
+            pos: 记录在缓冲区中的起始偏移
+            parse_payload: 是否解析块引用和主数据，为False时只解析记录头
+        """
+        # 一次性解包24字节记录头
+        (self.xl_tot_len,       # total len of entire record
+         self.xl_xid,           # xact id
+         self.xl_prev_raw,      # ptr to previous record in log
+         self.xl_info,          # flag bits
+         self.xl_rmid,          # resource manager for this record
+         self.xl_crc            # CRC for this record
+         ) = _XLOG_HDR.unpack_from(buf, pos)
+        self._xl_prev = None    # 延迟构造的LSN对象
+        
+        # 构造时一次性提取标志位，避免每次访问都做掩码运算
+        self.info = self.xl_info & 0x0F
+        self.rmgr_info = self.xl_info & 0xF0
         
         # 解析记录数据
-        self.blocks = []  # 块引用列表
+        self.blocks: List[BlockRef] = []  # 块引用列表
         self.main_data = b''  # 主数据
         
         # 解析块引用和主数据
-        self._parse_record_data(reader)
+        self._payload_parsed = parse_payload
+        if parse_payload:
+            self._parse_record_data(buf, pos + _XLOG_HDR_SIZE)
+    
+    def ensure_payload_parsed(self, buf, pos: int):
+        """
+        按需解析以parse_payload=False构造的记录的块引用和主数据
+        
+        Args:
+            buf: 包含记录的缓冲区
+            pos: 记录在缓冲区中的起始偏移
+        """
+        if not self._payload_parsed:
+            self._payload_parsed = True
+            self._parse_record_data(buf, pos + _XLOG_HDR_SIZE)
+    
+    def verify_crc(self, buf, pos: int) -> bool:
+        """
+        校验记录的CRC-32C
+        
+        与PostgreSQL一致，先计算记录头之后的数据，再计算xl_crc之前的头部字段，
+        两段直接在缓冲区上计算，无需拼接或拷贝。
+        
+        Args:
+            buf: 包含记录的缓冲区
+            pos: 记录在缓冲区中的起始偏移
+            
+        Returns:
+            如果CRC匹配返回True
+        """
+        view = memoryview(buf)
+        crc = crc32c(view[pos + _XLOG_HDR_SIZE:pos + self.xl_tot_len])
+        crc = crc32c(view[pos:pos + _XLOG_HDR_SIZE - 4], crc)  # offsetof(XLogRecord, xl_crc)
+        return crc == self.xl_crc
     
-    def _parse_record_data(self, reader: BinaryReader):
+    @property
+    def xl_prev(self) -> LSN:
+        """
+        上一条记录的LSN，首次访问时才构造LSN对象
+        
+        Returns:
+            上一条记录的LSN
+        """
+        if self._xl_prev is None:
+            self._xl_prev = LSN(self.xl_prev_raw)
+        return self._xl_prev
+    
+    def _parse_record_data(self, buf, pos: int) -> int:
         """
         解析记录的块引用和主数据部分
+        
+        Returns:
+            解析结束后的偏移
         """
-        # 计算记录数据的起始位置和长度
-        data_start = reader.tell()
-        data_end = data_start + self.xl_tot_len - self.SIZEOF_XLOG_RECORD
+        # 计算记录数据的结束位置
+        data_end = pos + self.xl_tot_len - _XLOG_HDR_SIZE
+        buf_len = len(buf)
         
         # 解析块引用
-        while reader.tell() < data_end:
+        while pos < data_end:
             # 查看下一个字节的ID
-            next_byte = reader.peek_bytes(1)
-            if not next_byte:
+            if pos >= buf_len:
                 break
                 
-            block_id = next_byte[0]
+            block_id = buf[pos]
             
             if block_id == 255:  # XLR_BLOCK_ID_DATA_SHORT
-                self._parse_data_short(reader)
-                break
+                return self._parse_data_short(buf, pos)
             elif block_id == 254:  # XLR_BLOCK_ID_DATA_LONG
-                self._parse_data_long(reader)
-                break
-            elif block_id in [253, 252]:  # XLR_BLOCK_ID_ORIGIN, XLR_BLOCK_ID_TOPLEVEL_XID
-                # 跳过这些特殊块
-                reader.read_bytes(1)
-                if block_id == 253:  # XLR_BLOCK_ID_ORIGIN
-                    reader.skip_bytes(2)  # RepOriginId
-                else:  # XLR_BLOCK_ID_TOPLEVEL_XID
-                    reader.skip_bytes(4)  # TransactionId
+                return self._parse_data_long(buf, pos)
+            elif block_id in (253, 252):  # XLR_BLOCK_ID_ORIGIN, XLR_BLOCK_ID_TOPLEVEL_XID
+                # 跳过id及其后的RepOriginId(2字节)或TransactionId(4字节)
+                pos += 3 if block_id == 253 else 5
+                if pos > buf_len:
+                    raise EOFError("记录数据超出缓冲区末尾")
             else:
                 # 普通块引用
-                self._parse_block_reference(reader)
+                pos = self._parse_block_reference(buf, pos)
+        
+        return pos
     
-    def _parse_block_reference(self, reader: BinaryReader):
+    def _parse_block_reference(self, buf, pos: int) -> int:
         """
         解析块引用
-        """
-        start_pos = reader.tell()
         
+        Returns:
+            块引用之后的偏移
+        """
         # 读取块头
-        block_id = reader.read_uint8()
-        fork_flags = reader.read_uint8()
-        data_length = reader.read_uint16()
-        
-        block_info = {
-            'id': block_id,
-            'fork_flags': fork_flags,
-            'data_length': data_length,
-            'has_image': bool(fork_flags & 0x10),
-            'has_data': bool(fork_flags & 0x20),
-            'will_init': bool(fork_flags & 0x40),
-            'same_rel': bool(fork_flags & 0x80),
-            'fork_num': fork_flags & 0x0F
-        }
+        block_id, fork_flags, data_length = _BLK_HDR.unpack_from(buf, pos)
+        pos += _BLK_HDR.size
+        
+        block = BlockRef(block_id, fork_flags, data_length)
         
         # 如果有页面镜像
-        if block_info['has_image']:
-            self._parse_block_image(reader, block_info)
+        if fork_flags & 0x10:
+            pos = self._parse_block_image(buf, pos, block)
         
         # 如果不是相同关系，读取关系文件节点
-        if not block_info['same_rel']:
-            block_info['relfilenode'] = {
-                'spcNode': reader.read_uint32(),
-                'dbNode': reader.read_uint32(),
-                'relNode': reader.read_uint32()
-            }
+        if not fork_flags & 0x80:
+            block.relfilenode = RelFileNode(*_REL.unpack_from(buf, pos))
+            pos += _REL.size
         
         # 读取块号
-        block_info['block_num'] = reader.read_uint32()
+        block.block_num = _U32.unpack_from(buf, pos)[0]
+        pos += 4
         
         # 如果有数据，读取数据
-        if block_info['has_data']:
-            block_info['data'] = reader.read_bytes(data_length)
+        if fork_flags & 0x20:
+            block.data = _read_slice(buf, pos, data_length)
+            pos += data_length
         
-        self.blocks.append(block_info)
+        self.blocks.append(block)
+        return pos
     
-    def _parse_block_image(self, reader: BinaryReader, block_info: Dict[str, Any]):
+    def _parse_block_image(self, buf, pos: int, block: BlockRef) -> int:
         """
         解析块镜像
+        
+        Returns:
+            块镜像之后的偏移
         """
-        length = reader.read_uint16()
-        hole_offset = reader.read_uint16()
-        bimg_info = reader.read_uint8()
+        length, hole_offset, bimg_info = _BIMG.unpack_from(buf, pos)
+        pos += _BIMG.size
         
-        block_info['image'] = {
-            'length': length,
-            'hole_offset': hole_offset,
-            'bimg_info': bimg_info,
-            'has_hole': bool(bimg_info & 0x01),
-            'should_apply': bool(bimg_info & 0x02)
-        }
+        image = BlockImage(length, hole_offset, bimg_info)
         
         # 如果有压缩信息
         if (bimg_info & 0x01) and (bimg_info & 0x1C):  # has_hole and compressed
-            hole_length = reader.read_uint16()
-            block_info['image']['hole_length'] = hole_length
+            image.hole_length = _U16.unpack_from(buf, pos)[0]
+            pos += 2
         
         # 读取镜像数据
-        block_info['image']['data'] = reader.read_bytes(length)
+        image.data = _read_slice(buf, pos, length)
+        block.image = image
+        return pos + length
     
-    def _parse_data_short(self, reader: BinaryReader):
+    def _parse_data_short(self, buf, pos: int) -> int:
         """
         解析短格式主数据
+        
+        Returns:
+            主数据之后的偏移
         """
-        reader.read_bytes(1)  # id (255)
-        data_length = reader.read_uint8()
-        self.main_data = reader.read_bytes(data_length)
+        # id (255)之后是1字节长度
+        data_length = _U8.unpack_from(buf, pos + 1)[0]
+        self.main_data = _read_slice(buf, pos + 2, data_length)
+        return pos + 2 + data_length
     
-    def _parse_data_long(self, reader: BinaryReader):
+    def _parse_data_long(self, buf, pos: int) -> int:
         """
         解析长格式主数据
+        
+        Returns:
+            主数据之后的偏移
         """
-        reader.read_bytes(1)  # id (254)
-        data_length = reader.read_uint32()
-        self.main_data = reader.read_bytes(data_length)
+        # id (254)之后是4字节长度
+        data_length = _U32.unpack_from(buf, pos + 1)[0]
+        self.main_data = _read_slice(buf, pos + 5, data_length)
+        return pos + 5 + data_length
     
     def get_rmgr_info(self) -> int:
         """
         获取资源管理器信息
         
         Returns:
-            资源管理器信息
+            资源管理器信息（构造时已缓存于rmgr_info属性）
         """
-        return self.xl_info & self.XLR_RMGR_INFO_MASK
+        return self.rmgr_info
     
     def get_info(self) -> int:
         """
         获取记录信息
         
         Returns:
-            记录信息
+            记录信息（构造时已缓存于info属性）
         """
-        return self.xl_info & self.XLR_INFO_MASK
+        return self.info
     
     def is_special_rel_update(self) -> bool:
         """
@@ -206,6 +375,8 @@ class WALPageHeader:
     WAL页头结构
     """
     
+    __slots__ = ('magic', 'info', 'tli', 'prev_page_lsn', 'page_lsn')
+    
     SIZEOF_WAL_PAGE_HEADER = 24
     
     def __init__(self, reader: BinaryReader):
@@ -240,31 +411,150 @@ class WALFile:
     WAL_BLOCK_SIZE = 8192                # 8KB
     XLOG_PAGE_MAGIC = 0xD099             # WAL页魔数
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, headers_only: bool = False, verify_crc: bool = False,
+                 payload_rmids: Optional[Iterable[int]] = None):
         """
         初始化WAL文件解析器
         
         Args:
             file_path: WAL文件路径
+            headers_only: 为True时只解析记录头，跳过块引用和主数据
+            verify_crc: 为True时校验每条记录的CRC，校验失败视为记录损坏
+            payload_rmids: 只为这些资源管理器ID的记录解析块引用和主数据，None表示全部解析
         """
         self.file_path = file_path
+        self.headers_only = headers_only
+        self.verify_crc = verify_crc
+        
+        # 需要解析负载的rmid集合，None表示全部
+        if headers_only:
+            self._payload_rmids: Optional[FrozenSet[int]] = frozenset()
+        elif payload_rmids is not None:
+            self._payload_rmids = frozenset(payload_rmids)
+        else:
+            self._payload_rmids = None
         self.file_data = None
         self.records = []
         
-    def parse(self):
+        # 记录头部的列式(SoA)存储，与self.records按下标一一对应
+        self._record_offsets = array('Q')  # 记录在文件中的偏移
+        self._rmid_array = array('B')      # xl_rmid
+        self._xid_array = array('I')       # xl_xid
+        
+        # 按事务ID/资源管理器ID建立的记录下标索引，首次按条件查找时才构建
+        self._by_xid: Optional[Dict[int, List[int]]] = None
+        self._by_rmid: Optional[Dict[int, List[int]]] = None
+        
+    def parse(self, workers: int = 1):
         """
         解析WAL文件
+        
+        Args:
+            workers: 解析WAL页使用的进程数，大于1时按页并行解析
         """
-        with open(self.file_path, 'rb') as f:
-            self.file_data = f.read()
+        self.file_data = _map_file(self.file_path)
         
-        reader = BinaryReader(self.file_data)
+        # 记录解析直接基于memoryview进行，避免逐字段的读取器方法调用
+        reader = BinaryReader(memoryview(self.file_data))
         
         # 解析WAL文件头
         self._parse_wal_file_header(reader)
         
         # 解析WAL页
-        self._parse_wal_pages(reader)
+        self._parse_wal_pages(reader, workers)
+        
+        # 记录已变化，索引在下次查找时重新构建
+        self._by_xid = self._by_rmid = None
+    
+    def iter_records(self) -> Iterator[XLogRecord]:
+        """
+        流式解析WAL文件，逐条产出记录
+        
+        与parse()不同，不在内存中保留记录列表和索引，适合只需顺序处理一遍的大文件。
+        迭代结束或生成器关闭时释放文件映射。
+        
+        Yields:
+            XLOG记录
+        """
+        file_data = _map_file(self.file_path)
+        try:
+            with memoryview(file_data) as view:
+                reader = BinaryReader(view)
+                
+                # 解析WAL文件头
+                self._parse_wal_file_header(reader)
+                
+                for _, record in self._iter_wal_pages(view, reader.tell()):
+                    yield record
+        finally:
+            if isinstance(file_data, mmap.mmap):
+                file_data.close()
+    
+    @property
+    def xid_array(self) -> array:
+        """
+        与records一一对应的事务ID数组
+        
+        Returns:
+            xl_xid的紧凑数组
+        """
+        return self._xid_array
+    
+    def load_payload(self, index: int) -> XLogRecord:
+        """
+        按需解析指定记录的块引用和主数据
+    
+        用于headers_only或payload_rmids跳过了负载的记录，需在parse()之后、close()之前调用。
+    
+        Args:
+            index: 记录在self.records中的下标
+    
+        Returns:
+            负载已解析的记录
+        """
+        if self.file_data is None:
+            raise RuntimeError("WAL文件未映射，请在parse()之后、close()之前调用")
+        record = self.records[index]
+        record.ensure_payload_parsed(self.file_data, self._record_offsets[index])
+        return record
+    
+    def close(self):
+        """
+        释放WAL文件的内存映射
+        """
+        if isinstance(self.file_data, mmap.mmap):
+            self.file_data.close()
+        self.file_data = None
+    
+    def __enter__(self):
+        """
+        上下文管理器入口
+        """
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        上下文管理器出口
+        """
+        self.close()
+    
+    def _ensure_indexes(self):
+        """
+        按需构建按xid和rmid查找记录的下标索引，已构建时直接返回
+        """
+        if self._by_xid is not None:
+            return
+        
+        by_xid = defaultdict(list)
+        for i, xid in enumerate(self._xid_array):
+            by_xid[xid].append(i)
+        
+        by_rmid = defaultdict(list)
+        for i, rmid in enumerate(self._rmid_array):
+            by_rmid[rmid].append(i)
+        
+        self._by_xid = dict(by_xid)
+        self._by_rmid = dict(by_rmid)
     
     def _parse_wal_file_header(self, reader: BinaryReader):
         """
@@ -279,64 +569,130 @@ class WALFile:
         # 跳过到第一个WAL页
         reader.seek(self.xlog_blcksz)
     
-    def _parse_wal_pages(self, reader: BinaryReader):
+    def _parse_wal_pages(self, reader: BinaryReader, workers: int = 1):
         """
         解析WAL页
+        
+        Args:
+            reader: 位于第一个WAL页的读取器
+            workers: 并行解析使用的进程数
         """
-        while not reader.is_eof():
+        buf = reader.data
+        first_page = reader.tell()
+        
+        if workers > 1:
+            page_results = self._parse_pages_parallel(first_page, workers)
+        else:
+            page_results = None
+        
+        for record_start, record in self._iter_wal_pages(buf, first_page, page_results):
+            self.records.append(record)
+            self._record_offsets.append(record_start)
+            self._rmid_array.append(record.xl_rmid)
+            self._xid_array.append(record.xl_xid)
+    
+    def _iter_wal_pages(self, buf, first_page: int,
+                        page_results: Optional[Dict[int, Tuple[list, int]]] = None
+                        ) -> Iterator[Tuple[int, XLogRecord]]:
+        """
+        按顺序遍历WAL页，产出每条记录及其在文件中的偏移
+        
+        Args:
+            buf: 文件数据
+            first_page: 第一个WAL页的偏移
+            page_results: 并行解析得到的各页结果，None表示在此顺序解析
+            
+        Yields:
+            (记录偏移, 记录)
+        """
+        pos = first_page
+        buf_len = len(buf)
+        while pos < buf_len:
             # 检查是否到达页边界
-            pos = reader.tell()
             if pos % self.WAL_BLOCK_SIZE != 0:
                 # 对齐到页边界
-                next_page = ((pos // self.WAL_BLOCK_SIZE) + 1) * self.WAL_BLOCK_SIZE
-                if next_page >= len(self.file_data):
+                pos = ((pos // self.WAL_BLOCK_SIZE) + 1) * self.WAL_BLOCK_SIZE
+                if pos >= buf_len:
                     break
-                reader.seek(next_page)
                 continue
             
-            # 读取页头
-            if reader.remaining_bytes() < WALPageHeader.SIZEOF_WAL_PAGE_HEADER:
+            # 检查剩余数据是否足够读取页头
+            if buf_len - pos < WALPageHeader.SIZEOF_WAL_PAGE_HEADER:
                 break
-                
-            page_header = WALPageHeader(reader)
             
-            # 检查魔数
-            if page_header.magic != self.XLOG_PAGE_MAGIC:
-                continue
+            # 解析页中的记录；并行模式下直接取用子进程的结果
+            if page_results is not None:
+                page_records, next_pos = page_results[pos]
+            else:
+                page_records, next_pos = _parse_wal_page(buf, pos, self.WAL_BLOCK_SIZE,
+                                                         self._payload_rmids, self.verify_crc)
             
-            # 解析页中的记录
-            self._parse_page_records(reader, page_header)
+            yield from page_records
+            
+            pos = next_pos
     
-    def _parse_page_records(self, reader: BinaryReader, page_header: WALPageHeader):
-        """
-        解析页中的记录
+    def _parse_pages_parallel(self, first_page: int, workers: int) -> Dict[int, Tuple[list, int]]:
         """
-        page_start = reader.tell() - WALPageHeader.SIZEOF_WAL_PAGE_HEADER
-        page_end = page_start + self.WAL_BLOCK_SIZE
+        使用进程池并行解析所有页
         
-        while reader.tell() < page_end:
-            # 检查是否有足够的数据读取记录头
-            if reader.remaining_bytes() < XLogRecord.SIZEOF_XLOG_RECORD:
-                break
+        每个页都可以独立解析，各子进程自行读取文件，只返回解析结果。
+        被跨页记录覆盖的页由调用方按顺序拼接时跳过。
+        
+        Args:
+            first_page: 第一个WAL页的偏移
+            workers: 进程数
             
-            # 记录开始位置
-            record_start = reader.tell()
+        Returns:
+            页起始偏移到(记录列表, 解析结束位置)的映射
+        """
+        # 与_iter_wal_pages一致，从第一个按WAL_BLOCK_SIZE对齐的位置开始
+        block_size = self.WAL_BLOCK_SIZE
+        first_page = -(-first_page // block_size) * block_size
+        last_page = len(self.file_data) - WALPageHeader.SIZEOF_WAL_PAGE_HEADER
+        page_starts = list(range(first_page, last_page + 1, block_size))
+        chunk_size = max(1, -(-len(page_starts) // (workers * 4)))
+        chunks = [page_starts[i:i + chunk_size] for i in range(0, len(page_starts), chunk_size)]
+        
+        page_results = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_page_worker,
+                                 initargs=(self.file_path,)) as executor:
+            futures = [executor.submit(_parse_page_chunk, chunk, block_size,
+                                       self._payload_rmids, self.verify_crc)
+                       for chunk in chunks]
+            for future in futures:
+                page_results.update(future.result())
+        
+        return page_results
+    
+    def filter_indices(self, rmid: Optional[int] = None, xid: Optional[int] = None) -> List[int]:
+        """
+        按资源管理器ID和事务ID查找记录下标
+        
+        利用首次查找时构建的索引和列式数组：单个条件直接取索引，
+        两个条件时遍历较短的索引列表并对另一列做检查，不扫描全部记录。
+        
+        Args:
+            rmid: 资源管理器ID（可选）
+            xid: 事务ID（可选）
             
-            try:
-                # 解析XLOG记录
-                record = XLogRecord(reader)
-                self.records.append(record)
-                
-                # 移动到下一个记录
-                next_record = record_start + record.xl_tot_len
-                if next_record >= page_end:
-                    break
-                    
-                reader.seek(next_record)
-                
-            except (EOFError, struct.error):
-                # 记录损坏或到达文件末尾
-                break
+        Returns:
+            匹配记录在self.records中的下标列表（升序）
+        """
+        if rmid is None and xid is None:
+            return list(range(len(self.records)))
+        self._ensure_indexes()
+        if xid is None:
+            return list(self._by_rmid.get(rmid, ()))
+        if rmid is None:
+            return list(self._by_xid.get(xid, ()))
+        
+        by_rmid = self._by_rmid.get(rmid, ())
+        by_xid = self._by_xid.get(xid, ())
+        if len(by_rmid) <= len(by_xid):
+            xid_array = self._xid_array
+            return [i for i in by_rmid if xid_array[i] == xid]
+        rmid_array = self._rmid_array
+        return [i for i in by_xid if rmid_array[i] == rmid]
     
     def get_records_by_rmid(self, rmid: int) -> List[XLogRecord]:
         """
@@ -348,7 +704,9 @@ class WALFile:
         Returns:
             匹配的记录列表
         """
-        return [record for record in self.records if record.xl_rmid == rmid]
+        self._ensure_indexes()
+        records = self.records
+        return [records[i] for i in self._by_rmid.get(rmid, ())]
     
     def get_records_by_xid(self, xid: int) -> List[XLogRecord]:
         """
@@ -360,7 +718,188 @@ class WALFile:
         Returns:
             匹配的记录列表
         """
-        return [record for record in self.records if record.xl_xid == xid]
+        self._ensure_indexes()
+        records = self.records
+        return [records[i] for i in self._by_xid.get(xid, ())]
+
+
+def _map_file(file_path: str):
+    """
+    以只读方式内存映射文件，由操作系统页缓存按需加载，避免整体读入的拷贝
+    
+    Args:
+        file_path: 文件路径
+        
+    Returns:
+        mmap对象；空文件无法映射，返回空bytes
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def record_parser_for(payload_rmids: Optional[FrozenSet[int]]) -> Callable[..., XLogRecord]:
+    """
+    获取按资源管理器特化的记录解析函数
+    
+    特化后的函数只为payload_rmids中的记录解析块引用和主数据，其余记录只解码记录头，
+    并跳过XLogRecord.__init__的通用参数处理。结果按rmid集合缓存。
+    
+    Args:
+        payload_rmids: 需要解析负载的rmid集合，None表示全部解析
+        
+    Returns:
+        签名为(buf, pos)的记录解析函数
+    """
+    if payload_rmids is None:
+        return XLogRecord
+    return _specialized_record_parser(payload_rmids)
+
+
+@lru_cache(maxsize=None)
+def _specialized_record_parser(payload_rmids: FrozenSet[int]) -> Callable[..., XLogRecord]:
+    """
+    为给定的rmid集合生成记录解析函数
+    """
+    unpack_from = _XLOG_HDR.unpack_from
+    new_record = XLogRecord.__new__
+    
+    if not payload_rmids:
+        def parse(buf, pos: int) -> XLogRecord:
+            record = new_record(XLogRecord)
+            (record.xl_tot_len, record.xl_xid, record.xl_prev_raw,
+             record.xl_info, record.xl_rmid, record.xl_crc) = unpack_from(buf, pos)
+            record._xl_prev = None
+            record.info = record.xl_info & 0x0F
+            record.rmgr_info = record.xl_info & 0xF0
+            record.blocks = []
+            record.main_data = b''
+            record._payload_parsed = False
+            return record
+        return parse
+    
+    def parse(buf, pos: int) -> XLogRecord:
+        record = new_record(XLogRecord)
+        (record.xl_tot_len, record.xl_xid, record.xl_prev_raw,
+         record.xl_info, record.xl_rmid, record.xl_crc) = unpack_from(buf, pos)
+        record._xl_prev = None
+        record.info = record.xl_info & 0x0F
+        record.rmgr_info = record.xl_info & 0xF0
+        record.blocks = []
+        record.main_data = b''
+        if record.xl_rmid in payload_rmids:
+            record._payload_parsed = True
+            record._parse_record_data(buf, pos + _XLOG_HDR_SIZE)
+        else:
+            record._payload_parsed = False
+        return record
+    return parse
+
+
+def _parse_wal_page(buf, page_start: int, block_size: int,
+                    payload_rmids: Optional[FrozenSet[int]] = None,
+                    verify_crc: bool = False) -> Tuple[List[Tuple[int, XLogRecord]], int]:
+    """
+    解析单个WAL页中的记录
+    
+    Args:
+        buf: 整个WAL文件的缓冲区
+        page_start: 页起始偏移
+        block_size: 页大小
+        payload_rmids: 需要解析块引用和主数据的rmid集合，None表示全部解析
+        verify_crc: 是否校验记录CRC
+        
+    Returns:
+        (记录起始偏移与记录的列表, 解析结束位置)的元组。
+        若最后一条记录跨越页尾，结束位置为该记录末尾，其覆盖的页应被跳过。
+    """
+    reader = BinaryReader(buf)
+    reader.seek(page_start)
+    page_header = WALPageHeader(reader)
+    pos = reader.tell()
+    
+    # 检查魔数
+    if page_header.magic != WALFile.XLOG_PAGE_MAGIC:
+        return [], pos
+    
+    parse_record = record_parser_for(payload_rmids)
+    records = []
+    page_end = page_start + block_size
+    buf_len = len(buf)
+    
+    while pos < page_end:
+        # 检查是否有足够的数据读取记录头
+        if buf_len - pos < XLogRecord.SIZEOF_XLOG_RECORD:
+            break
+        
+        # 先检查记录长度：长度不合理（如页尾的零填充）时不是有效记录，
+        # 也无法定位下一条记录，从下一页边界继续
+        tot_len = _U32.unpack_from(buf, pos)[0]
+        if tot_len < XLogRecord.SIZEOF_XLOG_RECORD or pos + tot_len > buf_len:
+            pos = page_end
+            break
+        
+        try:
+            # 解析XLOG记录
+            record = parse_record(buf, pos)
+        except (EOFError, struct.error):
+            # 记录损坏或到达文件末尾
+            break
+        
+        if verify_crc and not record.verify_crc(buf, pos):
+            # CRC不匹配，视为记录损坏
+            break
+        
+        records.append((pos, record))
+        
+        # 移动到下一个记录
+        next_record = pos + tot_len
+        if next_record >= page_end:
+            pos = next_record
+            break
+        
+        pos = next_record
+    
+    return records, pos
+
+
+# 并行解析时子进程持有的WAL文件数据
+_worker_file_data = None
+
+
+def _init_page_worker(file_path: str):
+    """
+    进程池初始化函数，每个子进程只读取一次WAL文件
+    """
+    global _worker_file_data
+    file_data = _map_file(file_path)
+    _worker_file_data = memoryview(file_data)
+    # 工作进程最终以os._exit结束，atexit回调不会执行；
+    # multiprocessing的Finalize会在子进程退出流程中调用
+    Finalize(None, _close_page_worker, args=(file_data,), exitpriority=0)
+
+
+def _close_page_worker(file_data):
+    """
+    子进程退出时释放WAL文件数据的视图和内存映射
+    """
+    global _worker_file_data
+    if _worker_file_data is not None:
+        _worker_file_data.release()
+        _worker_file_data = None
+    if isinstance(file_data, mmap.mmap):
+        file_data.close()
+
+
+def _parse_page_chunk(page_starts: List[int], block_size: int,
+                      payload_rmids: Optional[FrozenSet[int]], verify_crc: bool) -> Dict[int, Tuple[list, int]]:
+    """
+    在子进程中解析一组WAL页
+    """
+    return {page_start: _parse_wal_page(_worker_file_data, page_start, block_size,
+                                        payload_rmids, verify_crc)
+            for page_start in page_starts}
 
 
 # 资源管理器ID常量（从PostgreSQL源码中提取）
@@ -392,6 +931,9 @@ RMGR_IDS = {
     24: 'Heap3'
 }
 
+# 按资源管理器ID索引的名称表，覆盖xl_rmid（uint8）的全部取值，未知ID为 'Unknown(n)'
+RMGR_NAMES = tuple(RMGR_IDS.get(rmid, f'Unknown({rmid})') for rmid in range(256))
+
 
 def get_rmgr_name(rmid: int) -> str:
     """
@@ -403,4 +945,6 @@ def get_rmgr_name(rmid: int) -> str:
     Returns:
         资源管理器名称
     """
-    return RMGR_IDS.get(rmid, f'Unknown({rmid})')
\ No newline at end of file
+    if 0 <= rmid < len(RMGR_NAMES):
+        return RMGR_NAMES[rmid]
+    return f'Unknown({rmid})'
\ No newline at end of file
@@ -3,7 +3,12 @@ XLOG记录读取器
 负责高效读取和解析WAL文件中的XLOG记录
 """
 
+import mmap
 import os
+import struct
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterator, List, Optional, Tuple, Union
 from pathlib import Path
 
@@ -12,39 +17,110 @@ from utils.binary_reader import BinaryReader
 from utils.lsn_utils import LSN
 
 
+# 预编译的记录长度读取函数，避免每条记录重新解析格式字符串
+_READ_U32 = struct.Struct('<I').unpack_from
+_READ_XLOG_HDR = struct.Struct('<IIQBBxxI').unpack_from
+
+# 操作系统内存页大小，madvise的偏移必须按它对齐（不一定是4KB，部分内核为16KB/64KB）
+_OS_PAGE_SIZE = mmap.PAGESIZE
+
+
+def _scan_record_offsets(page, start: int, end: int) -> List[int]:
+    """
+    扫描页面中的记录起始偏移
+    
+    只读取每条记录头部的xl_tot_len并按长度跳到下一条记录，不构造记录对象；
+    遇到剩余空间不足一个记录头、长度小于记录头或记录超出页面范围时停止，
+    损坏的长度在此处即被排除，不必依赖构造记录时抛出的异常。
+    
+    Args:
+        page: 页面数据
+        start: 第一条记录的偏移（页头之后）
+        end: 页面数据末尾
+        
+    Returns:
+        记录起始偏移列表
+    """
+    offsets = []
+    pos = start
+    
+    # 循环内用到的全局名和属性预先绑定为局部变量
+    min_len = XLogRecord.SIZEOF_XLOG_RECORD
+    read_u32 = _READ_U32
+    append = offsets.append
+    
+    while pos + min_len <= end:
+        total_len = read_u32(page, pos)[0]
+        
+        # 检查记录长度是否有效、是否超出页面范围
+        if total_len < min_len or pos + total_len > end:
+            break
+        
+        append(pos)
+        pos += total_len
+    
+    return offsets
+
+
 class XLogReader:
     """
     XLOG记录读取器
     提供流式读取WAL记录的功能
     """
     
-    def __init__(self, wal_file_path: str):
+    def __init__(self, wal_file_path: str, depth: int = 128):
         """
         初始化XLOG读取器
         
         Args:
             wal_file_path: WAL文件路径
+            depth: 预读深度（页数），读取过程中始终让内核提前读入后续这么多页，0表示不预读
         """
         self.wal_file_path = wal_file_path
         self.file_size = os.path.getsize(wal_file_path)
         self.file_handle = None
         self.current_position = 0
+        self.depth = depth
+        self._readahead_end = 0  # 已提交预读请求的文件末端位置
         
         # WAL文件常量
         self.WAL_BLOCK_SIZE = 8192
         self.XLOG_PAGE_MAGIC = 0xD099
         
+        # 文件的只读内存映射，页面直接以memoryview切片解析，无需read()拷贝
+        self._mm = None
+        self._view = memoryview(b'')
+        
     def __enter__(self):
         """
         上下文管理器入口
         """
         self.file_handle = open(self.wal_file_path, 'rb')
+        self._readahead_end = 0
+        
+        # 空文件无法映射
+        if self.file_size > 0:
+            self._mm = mmap.mmap(self.file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mm)
+            if self.depth > 0 and hasattr(self._mm, 'madvise'):
+                # 顺序扫描：提示内核加大预读窗口
+                self._mm.madvise(mmap.MADV_SEQUENTIAL)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
         上下文管理器出口
         """
+        if self._mm is not None:
+            self._view.release()
+            self._view = memoryview(b'')
+            try:
+                self._mm.close()
+            except BufferError:
+                # 仍有未关闭的read_records生成器引用着页面切片，映射随其回收而释放
+                pass
+            self._mm = None
+        
         if self.file_handle:
             self.file_handle.close()
             self.file_handle = None
@@ -65,18 +141,27 @@ class XLogReader:
             raise RuntimeError("XLogReader未正确初始化，请使用with语句")
         
         # 如果指定了起始LSN，跳转到对应位置
-        if start_lsn:
-            self._seek_to_lsn(start_lsn)
+        if start_lsn is not None:
+            self._seek_to_lsn_int(start_lsn.value)
         
-        while self.current_position < self.file_size:
+        # 最后一个完整页面的起始位置，文件末尾不足一页的数据不构成完整页面
+        last_page = self.file_size - self.WAL_BLOCK_SIZE
+        iter_page_records = self._iter_page_records
+        
+        if end_lsn is None:
+            while self.current_position <= last_page:
+                yield from iter_page_records()
+            return
+        
+        # 内部直接比较原始64位LSN值，不为每条记录构造LSN对象
+        end_value = end_lsn.value
+        while self.current_position <= last_page:
             # 检查是否到达结束LSN
-            if end_lsn and self._current_lsn() > end_lsn:
+            if self.current_position > end_value:
                 break
             
-            # 读取页面
-            page_records = self._read_page_records()
-            for record in page_records:
-                if end_lsn and self._record_lsn(record) > end_lsn:
+            for record in iter_page_records():
+                if record.xl_prev_raw > end_value:
                     return
                 yield record
     
@@ -87,87 +172,143 @@ class XLogReader:
         Args:
             lsn: 目标LSN
         """
+        self._seek_to_lsn_int(lsn.value)
+    
+    def _seek_to_lsn_int(self, lsn_value: int):
+        """
+        跳转到原始64位LSN值对应的位置
+        
+        Args:
+            lsn_value: 目标LSN值
+        """
         # 计算LSN对应的文件位置
         # LSN的高32位是文件号，低32位是文件内偏移
-        file_offset = lsn.file_offset
+        file_offset = lsn_value & 0xFFFFFFFF
         
         # 对齐到页边界
         page_aligned_offset = (file_offset // self.WAL_BLOCK_SIZE) * self.WAL_BLOCK_SIZE
         
         # 跳转到计算的位置
-        self.file_handle.seek(page_aligned_offset)
         self.current_position = page_aligned_offset
+        self._readahead_end = page_aligned_offset
     
-    def _read_page_records(self) -> List[XLogRecord]:
+    def _prefetch(self, position: int):
         """
-        读取当前页面的所有记录
+        提交后续页面的异步预读请求
+        
+        已提交的预读窗口消耗过半时，再对接下来depth页调用MADV_WILLNEED，
+        使内核在解析当前页面的同时并发读入后续页面，访问时不再触发同步缺页读盘。
+        
+        Args:
+            position: 下一次读取的文件偏移
+        """
+        # 预读窗口向上取整到内存页大小的整数倍
+        window = -(-self.depth * self.WAL_BLOCK_SIZE // _OS_PAGE_SIZE) * _OS_PAGE_SIZE
+        if self._readahead_end - position > window // 2:
+            return
+        
+        # madvise的起始偏移必须是内存页大小的整数倍，向下对齐
+        start = max(self._readahead_end, position)
+        start -= start % _OS_PAGE_SIZE
+        if start >= self.file_size:
+            return
+        
+        self._mm.madvise(mmap.MADV_WILLNEED, start, min(window, self.file_size - start))
+        self._readahead_end = start + window
+    
+    def _read_page(self) -> Optional[Tuple[memoryview, int]]:
+        """
+        读取当前页面并前进到下一页
         
         Returns:
-            页面中的记录列表
+            (页面视图, 第一条记录在页内的偏移)；不足一页、页头损坏或魔数不符时返回None
         """
-        if self.current_position + self.WAL_BLOCK_SIZE > self.file_size:
-            return []
+        block_size = self.WAL_BLOCK_SIZE
+        offset = self.current_position
+        if offset + block_size > self.file_size:
+            return None
         
-        # 读取页面数据
-        page_data = self.file_handle.read(self.WAL_BLOCK_SIZE)
-        self.current_position += len(page_data)
+        if self.depth > 0 and hasattr(self._mm, 'madvise'):
+            self._prefetch(offset)
         
-        if len(page_data) < self.WAL_BLOCK_SIZE:
-            return []
+        # 直接在映射上切出页面视图（记录解析时会拷贝所需字节）
+        self.current_position = offset + block_size
+        page_data = self._view[offset:offset + block_size]
         
         reader = BinaryReader(page_data)
         
         # 读取页头
         try:
             page_header = WALPageHeader(reader)
-        except:
-            return []
+        except (struct.error, EOFError, ValueError):
+            return None
         
         # 检查魔数
         if page_header.magic != self.XLOG_PAGE_MAGIC:
-            return []
+            return None
+        
+        return page_data, reader.tell()
+    
+    def _iter_page_records(self) -> Iterator[XLogRecord]:
+        """
+        读取当前页面并逐条产出其中的记录
         
-        # 解析页面中的记录
-        records = []
-        page_start = self.current_position - self.WAL_BLOCK_SIZE
-        page_end = page_start + self.WAL_BLOCK_SIZE
+        Yields:
+            页面中的记录
+        """
+        page = self._read_page()
+        if page is None:
+            return
+        page_data, first_record = page
         
-        while reader.tell() < len(page_data):
-            # 检查是否有足够的数据读取记录头
-            if reader.remaining_bytes() < XLogRecord.SIZEOF_XLOG_RECORD:
-                break
-            
-            record_start = reader.tell()
-            
+        # 先扫描出完整落在页内的记录偏移，再逐个构造记录对象
+        make_record = XLogRecord
+        for record_start in _scan_record_offsets(page_data, first_record, self.WAL_BLOCK_SIZE):
             try:
-                # 读取记录头
-                xl_tot_len = reader.peek_bytes(4)
-                if len(xl_tot_len) < 4:
-                    break
-                
-                import struct
-                total_len = struct.unpack('<I', xl_tot_len)[0]
-                
-                # 检查记录是否超出页面范围
-                if record_start + total_len > len(page_data):
-                    break
-                
-                # 解析完整记录
-                record = XLogRecord(reader)
-                records.append(record)
-                
-                # 移动到下一个记录
-                next_record = record_start + total_len
-                if next_record >= len(page_data):
-                    break
-                
-                reader.seek(next_record)
-                
+                record = make_record(page_data, record_start)
             except (struct.error, EOFError):
                 # 记录损坏，跳过此记录
                 break
+            yield record
+    
+    def scan_headers(self) -> 'XLogRecordHeaders':
+        """
+        批量扫描剩余页面中所有记录的记录头
         
-        return records
+        只解码每条记录24字节的记录头并存入列式数组，不构造XLogRecord对象，
+        适合先按rmid/xid等字段筛选、只为少量记录解析完整内容的场景。
+        需在with语句内使用返回结果的按下标取记录功能。
+        
+        Returns:
+            记录头列式表
+        """
+        if not self.file_handle:
+            raise RuntimeError("XLogReader未正确初始化，请使用with语句")
+        
+        headers = XLogRecordHeaders(self)
+        offsets, tot_lens, xids = headers.offsets, headers.tot_len, headers.xid
+        prevs, infos, rmids = headers.prev, headers.info, headers.rmid
+        read_header = _READ_XLOG_HDR
+        block_size = self.WAL_BLOCK_SIZE
+        last_page = self.file_size - block_size
+        
+        while self.current_position <= last_page:
+            page_offset = self.current_position
+            page = self._read_page()
+            if page is None:
+                continue
+            page_data, first_record = page
+            
+            for record_start in _scan_record_offsets(page_data, first_record, block_size):
+                tot_len, xid, prev, info, rmid, _ = read_header(page_data, record_start)
+                offsets.append(page_offset + record_start)
+                tot_lens.append(tot_len)
+                xids.append(xid)
+                prevs.append(prev)
+                infos.append(info)
+                rmids.append(rmid)
+        
+        return headers
     
     def _current_lsn(self) -> LSN:
         """
@@ -193,45 +334,127 @@ class XLogReader:
         return record.xl_prev
 
 
+def _parse_segment(segment_file: str, start_lsn: LSN, end_lsn: LSN) -> List[XLogRecord]:
+    """
+    读取一个段文件中指定LSN范围内的全部记录，供线程池预读使用
+    
+    Args:
+        segment_file: 段文件路径
+        start_lsn: 起始LSN
+        end_lsn: 结束LSN
+        
+    Returns:
+        记录列表
+    """
+    with XLogReader(segment_file) as reader:
+        return list(reader.read_records(start_lsn, end_lsn))
+
+
+class XLogRecordHeaders:
+    """
+    记录头列式表
+    以数组按列保存XLogReader.scan_headers扫描出的记录头，下标访问时才构造完整的XLogRecord
+    """
+    
+    def __init__(self, reader: XLogReader):
+        """
+        初始化记录头列式表
+        
+        Args:
+            reader: 产生这些记录头的读取器，按下标取记录时从它的文件映射中解析
+        """
+        self._reader = reader
+        self.offsets = array('Q')  # 记录在文件中的偏移
+        self.tot_len = array('I')  # xl_tot_len
+        self.xid = array('I')      # xl_xid
+        self.prev = array('Q')     # xl_prev原始值
+        self.info = array('B')     # xl_info
+        self.rmid = array('B')     # xl_rmid
+    
+    def __len__(self) -> int:
+        return len(self.offsets)
+    
+    def __getitem__(self, index: int) -> XLogRecord:
+        """
+        解析指定下标的完整记录
+        
+        与逐页读取一致，在记录所在页面的视图上解析，越过页尾的损坏记录同样抛出EOFError。
+        
+        Args:
+            index: 记录下标
+            
+        Returns:
+            XLOG记录
+        """
+        reader = self._reader
+        offset = self.offsets[index]
+        page_offset = offset - offset % reader.WAL_BLOCK_SIZE
+        page_data = reader._view[page_offset:page_offset + reader.WAL_BLOCK_SIZE]
+        return XLogRecord(page_data, offset - page_offset)
+
+
 class XLogSegmentReader:
     """
     XLOG段文件读取器
     用于处理多个WAL段文件的连续读取
     """
     
-    def __init__(self, segment_directory: str, timeline_id: int = 1):
+    def __init__(self, segment_directory: str, timeline_id: int = 1, prefetch: int = 4):
         """
         初始化XLOG段文件读取器
         
         Args:
             segment_directory: WAL段文件目录
             timeline_id: 时间线ID
+            prefetch: 同时预读的段文件数，1表示逐个顺序读取
         """
         self.segment_directory = Path(segment_directory)
         self.timeline_id = timeline_id
         self.segment_size = 16 * 1024 * 1024  # 16MB
+        self.prefetch = prefetch
+        self._executor = None  # with语句期间所有读取共享的预读线程池
+        self._pending_queues = {}  # 使用共享线程池的读取中尚未取用的预读任务队列，按id索引
         
-        # 查找所有段文件
+        # 查找所有段文件（已按文件名排序）
         self.segment_files = self._find_segment_files()
-        self.segment_files.sort()
         
+    def __enter__(self):
+        """
+        上下文管理器入口，创建供所有读取共享的预读线程池
+        """
+        if self.prefetch > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.prefetch)
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        上下文管理器出口
+        """
+        if self._executor is not None:
+            # 取消尚未开始的预读后再等待线程池结束（shutdown的cancel_futures参数需要Python 3.9）
+            for pending in self._pending_queues.values():
+                for future in pending:
+                    future.cancel()
+            self._pending_queues.clear()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
     def _find_segment_files(self) -> List[str]:
         """
         查找所有段文件
         
         Returns:
-            段文件路径列表
+            按文件名排序的段文件路径列表
         """
-        segment_files = []
-        
         # WAL段文件命名格式: {timeline_id}{segment_id:08X}
         pattern = f"{self.timeline_id:08X}"
         
-        for file_path in self.segment_directory.glob(f"{pattern}*"):
-            if file_path.is_file():
-                segment_files.append(str(file_path))
-        
-        return segment_files
+        # scandir的目录项自带文件类型，普通文件无需逐个stat；筛选和排序一次完成
+        with os.scandir(self.segment_directory) as entries:
+            return sorted(
+                entry.path for entry in entries
+                if entry.name.startswith(pattern) and entry.is_file()
+            )
     
     def read_records(self, start_lsn: Optional[LSN] = None,
                     end_lsn: Optional[LSN] = None) -> Iterator[XLogRecord]:
@@ -245,47 +468,82 @@ class XLogSegmentReader:
         Yields:
             XLOG记录
         """
+        # 段范围计算直接使用原始LSN值，只在传给段读取器时构造LSN对象
+        start_value = start_lsn.value if start_lsn is not None else None
+        end_value = end_lsn.value if end_lsn is not None else None
+        
         # 确定要读取的段文件范围
         start_segment = 0
         end_segment = len(self.segment_files) - 1
         
-        if start_lsn:
-            start_segment = self._lsn_to_segment_index(start_lsn)
+        if start_value is not None:
+            start_segment = self._lsn_to_segment_index(start_value)
         
-        if end_lsn:
-            end_segment = self._lsn_to_segment_index(end_lsn)
+        if end_value is not None:
+            end_segment = self._lsn_to_segment_index(end_value)
         
-        # 读取指定范围的段文件
+        # 计算每个段文件要读取的LSN范围
+        segments = []
         for i in range(start_segment, min(end_segment + 1, len(self.segment_files))):
-            segment_file = self.segment_files[i]
+            segment_start = self._segment_index_to_lsn(i)
+            segment_end = self._segment_index_to_lsn(i + 1) - 1
+            
+            # 调整LSN范围
+            if start_value is not None:
+                segment_start = max(segment_start, start_value)
+            if end_value is not None:
+                segment_end = min(segment_end, end_value)
             
-            with XLogReader(segment_file) as reader:
-                # 计算当前段的LSN范围
-                segment_start_lsn = self._segment_index_to_lsn(i)
-                segment_end_lsn = self._segment_index_to_lsn(i + 1) - 1
-                
-                # 调整LSN范围
-                segment_start = max(segment_start_lsn, start_lsn) if start_lsn else segment_start_lsn
-                segment_end = min(segment_end_lsn, end_lsn) if end_lsn else segment_end_lsn
-                
-                # 读取记录
-                for record in reader.read_records(segment_start, segment_end):
-                    yield record
-    
-    def _lsn_to_segment_index(self, lsn: LSN) -> int:
+            segments.append((self.segment_files[i], LSN(segment_start), LSN(segment_end)))
+        
+        # 只有一个段文件时直接流式读取，避免线程池开销
+        if len(segments) <= 1 or self.prefetch <= 1:
+            for segment in segments:
+                with XLogReader(segment[0]) as reader:
+                    yield from reader.read_records(segment[1], segment[2])
+            return
+        
+        # 多个段文件时在线程池中预读后续prefetch个段，按提交顺序产出记录；
+        # 在with语句中使用时复用共享线程池，否则为本次读取临时创建
+        executor = self._executor
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=self.prefetch)
+        
+        pending = deque()
+        if not own_executor:
+            self._pending_queues[id(pending)] = pending
+        try:
+            for segment in segments:
+                pending.append(executor.submit(_parse_segment, *segment))
+                if len(pending) >= self.prefetch:
+                    yield from pending.popleft().result()
+            
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # 提前结束迭代时取消尚未开始的预读
+            for future in pending:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(wait=True)
+            else:
+                self._pending_queues.pop(id(pending), None)
+    
+    def _lsn_to_segment_index(self, lsn_value: int) -> int:
         """
         将LSN转换为段文件索引
         
         Args:
-            lsn: LSN
+            lsn_value: 原始64位LSN值
             
         Returns:
             段文件索引
         """
         # 简化实现，实际需要根据LSN计算段号
-        return lsn.file_id
+        return lsn_value >> 32
     
-    def _segment_index_to_lsn(self, index: int) -> LSN:
+    def _segment_index_to_lsn(self, index: int) -> int:
         """
         将段文件索引转换为LSN
         
@@ -293,10 +551,10 @@ class XLogSegmentReader:
             index: 段文件索引
             
         Returns:
-            LSN
+            原始64位LSN值
         """
         # 简化实现
-        return LSN((index << 32) | 0)
+        return index << 32
 
 
 class XLogFilteredReader:
@@ -314,6 +572,33 @@ class XLogFilteredReader:
         """
         self.reader = reader
     
+    def filter(self, *, rmid: Optional[int] = None, xid: Optional[int] = None,
+               info_mask: Optional[int] = None, start_lsn: Optional[LSN] = None,
+               end_lsn: Optional[LSN] = None) -> Iterator[XLogRecord]:
+        """
+        按组合条件过滤记录
+        
+        所有条件在一次扫描中同时判断，LSN范围直接下推给底层读取器。
+        
+        Args:
+            rmid: 资源管理器ID（可选）
+            xid: 事务ID（可选）
+            info_mask: 信息标志掩码（可选）
+            start_lsn: 起始LSN（可选）
+            end_lsn: 结束LSN（可选）
+            
+        Yields:
+            过滤后的XLOG记录
+        """
+        for record in self.reader.read_records(start_lsn, end_lsn):
+            if rmid is not None and record.xl_rmid != rmid:
+                continue
+            if xid is not None and record.xl_xid != xid:
+                continue
+            if info_mask is not None and not (record.info & info_mask):
+                continue
+            yield record
+    
     def filter_by_rmid(self, rmid: int) -> Iterator[XLogRecord]:
         """
         按资源管理器ID过滤记录
@@ -324,9 +609,7 @@ class XLogFilteredReader:
         Yields:
             过滤后的XLOG记录
         """
-        for record in self.reader.read_records():
-            if record.xl_rmid == rmid:
-                yield record
+        return self.filter(rmid=rmid)
     
     def filter_by_xid(self, xid: int) -> Iterator[XLogRecord]:
         """
@@ -338,9 +621,7 @@ class XLogFilteredReader:
         Yields:
             过滤后的XLOG记录
         """
-        for record in self.reader.read_records():
-            if record.xl_xid == xid:
-                yield record
+        return self.filter(xid=xid)
     
     def filter_by_lsn_range(self, start_lsn: LSN, end_lsn: LSN) -> Iterator[XLogRecord]:
         """
@@ -353,8 +634,7 @@ class XLogFilteredReader:
         Yields:
             过滤后的XLOG记录
         """
-        for record in self.reader.read_records(start_lsn, end_lsn):
-            yield record
+        return self.filter(start_lsn=start_lsn, end_lsn=end_lsn)
     
     def filter_by_info(self, info_mask: int) -> Iterator[XLogRecord]:
         """
@@ -366,6 +646,4 @@ class XLogFilteredReader:
         Yields:
             过滤后的XLOG记录
         """
-        for record in self.reader.read_records():
-            if record.get_info() & info_mask:
-                yield record
\ No newline at end of file
+        return self.filter(info_mask=info_mask)
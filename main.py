@@ -6,18 +6,36 @@ PostgreSQL WAL文件解析工具的命令行接口
 """
 
 import argparse
+import stat
 import sys
 import os
+from collections import Counter
+from contextlib import contextmanager
+from itertools import chain
 from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
 
 # 添加项目路径到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from core.wal_parser import WALFile, get_rmgr_name
+from core.wal_parser import WALFile, XLogRecord, get_rmgr_name
 from output.sql_formatter import SQLFormatter
+from utils.lsn_utils import LSN
 from utils.wal_text_parser import WALTextParser
 
 
+# SQL输出缓冲区大小，仅在不支持writev的平台上使用
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# 支持writev时由write_sql_chunks自行攒批写出，输出文件不再另加缓冲
+HAS_WRITEV = hasattr(os, 'writev')
+
+# 每次writev写出的片段数，不超过系统的IOV_MAX
+WRITEV_BATCH_SIZE = 1024
+if hasattr(os, 'sysconf') and 'SC_IOV_MAX' in os.sysconf_names:
+    WRITEV_BATCH_SIZE = min(WRITEV_BATCH_SIZE, max(1, os.sysconf('SC_IOV_MAX')))
+
+
 def create_parser() -> argparse.ArgumentParser:
     """
     创建命令行参数解析器
@@ -75,6 +93,73 @@ def create_parser() -> argparse.ArgumentParser:
     return parser
 
 
+@contextmanager
+def open_output(output_path: Optional[str] = None) -> Iterator[BinaryIO]:
+    """
+    打开SQL输出的二进制流
+    
+    支持writev的平台上返回无缓冲的文件，由write_sql_chunks按批直接写入文件描述符；
+    其他平台返回带大缓冲区的流，由缓冲区合并成大块写入。
+    
+    Args:
+        output_path: 输出文件路径，None表示标准输出
+        
+    Yields:
+        输出二进制流
+    """
+    buffering = 0 if HAS_WRITEV else OUTPUT_BUFFER_SIZE
+    if output_path:
+        with open(output_path, 'wb', buffering=buffering) as f:
+            yield f
+    else:
+        # 在标准输出的文件描述符上另建输出流，退出时只刷新不关闭
+        sys.stdout.flush()
+        with open(sys.stdout.fileno(), 'wb', buffering=buffering, closefd=False) as f:
+            yield f
+
+
+def _writev_all(fd: int, buffers: List[bytes]):
+    """
+    用一次writev系统调用写出一批缓冲区，部分写入时补写剩余数据
+    
+    Args:
+        fd: 文件描述符
+        buffers: 待写出的字节串列表
+    """
+    written = os.writev(fd, buffers)
+    if written < sum(map(len, buffers)):
+        remaining = memoryview(b''.join(buffers))[written:]
+        while remaining:
+            remaining = remaining[os.write(fd, remaining):]
+
+
+def write_sql_chunks(out: BinaryIO, chunks: Iterable[str]):
+    """
+    将SQL文本片段编码后写入输出流
+    
+    支持writev的平台上把编码后的片段攒成批，每批一次系统调用直接写入文件描述符，
+    省去片段拼接；其他平台交给输出流的缓冲区。
+    
+    Args:
+        out: 由open_output打开的输出流
+        chunks: SQL文本片段
+    """
+    if not HAS_WRITEV:
+        out.writelines(chunk.encode('utf-8') for chunk in chunks)
+        return
+    
+    fd = out.fileno()
+    batch = []
+    for chunk in chunks:
+        batch.append(chunk.encode('utf-8'))
+        if len(batch) >= WRITEV_BATCH_SIZE:
+            _writev_all(fd, batch)
+            batch.clear()
+    
+    if batch:
+        _writev_all(fd, batch)
+
+
 def validate_wal_file(file_path: str) -> bool:
     """
     验证WAL文件是否有效
@@ -85,51 +170,92 @@ def validate_wal_file(file_path: str) -> bool:
     Returns:
         如果文件有效返回True
     """
-    if not os.path.exists(file_path):
+    # 一次stat调用同时获取存在性、文件类型和大小
+    try:
+        st = os.stat(file_path)
+    except OSError:
         print(f"错误: 文件不存在: {file_path}", file=sys.stderr)
         return False
     
-    if not os.path.isfile(file_path):
+    if not stat.S_ISREG(st.st_mode):
         print(f"错误: 路径不是文件: {file_path}", file=sys.stderr)
         return False
     
-    if os.path.getsize(file_path) == 0:
+    if st.st_size == 0:
         print(f"错误: 文件为空: {file_path}", file=sys.stderr)
         return False
     
     return True
 
 
-def print_statistics(wal_file: WALFile, verbose: bool = False):
+class RecordStatistics:
     """
-    打印解析统计信息
-    
-    Args:
-        wal_file: 解析后的WAL文件对象
-        verbose: 是否显示详细信息
+    WAL记录统计累加器
+    在记录流经时逐条累计统计信息，无需保留完整的记录列表
     """
-    total_records = len(wal_file.records)
-    
-    print(f"WAL文件解析统计:", file=sys.stderr)
-    print(f"  文件路径: {wal_file.file_path}", file=sys.stderr)
-    print(f"  总记录数: {total_records}", file=sys.stderr)
-    
-    if verbose and total_records > 0:
-        # 按资源管理器统计
-        rmgr_stats = {}
-        for record in wal_file.records:
-            rmgr_name = get_rmgr_name(record.xl_rmid)
-            rmgr_stats[rmgr_name] = rmgr_stats.get(rmgr_name, 0) + 1
+    
+    def __init__(self):
+        """
+        初始化统计累加器
+        """
+        self.rmgr_counts = Counter()  # 按原始xl_rmid计数，显示时才转换为名称
+        self.first_record = None
+        self.last_record = None
+    
+    @property
+    def total_records(self) -> int:
+        """
+        已统计的记录总数
+        """
+        return sum(self.rmgr_counts.values())
+    
+    @property
+    def rmgr_stats(self) -> Dict[str, int]:
+        """
+        按资源管理器名称统计的记录数
+        """
+        return {get_rmgr_name(rmid): count for rmid, count in self.rmgr_counts.items()}
+    
+    def track(self, records: Iterable[XLogRecord]) -> Iterator[XLogRecord]:
+        """
+        包装记录迭代器，在产出每条记录的同时更新统计
         
-        print("  资源管理器统计:", file=sys.stderr)
-        for rmgr_name, count in sorted(rmgr_stats.items()):
-            print(f"    {rmgr_name}: {count}", file=sys.stderr)
+        Args:
+            records: XLOG记录的可迭代对象
+            
+        Yields:
+            原样产出的XLOG记录
+        """
+        rmgr_counts = self.rmgr_counts
+        for record in records:
+            if self.first_record is None:
+                self.first_record = record
+            self.last_record = record
+            rmgr_counts[record.xl_rmid] += 1
+            yield record
+    
+    def print(self, file_path: str, verbose: bool = False):
+        """
+        打印解析统计信息
         
-        # 显示LSN范围
-        if wal_file.records:
-            first_lsn = LSN(wal_file.records[0].xl_prev.value)
-            last_record = wal_file.records[-1]
-            last_lsn = LSN(last_record.xl_prev.value + last_record.xl_tot_len)
+        Args:
+            file_path: WAL文件路径
+            verbose: 是否显示详细信息
+        """
+        print(f"WAL文件解析统计:", file=sys.stderr)
+        print(f"  文件路径: {file_path}", file=sys.stderr)
+        total_records = self.total_records
+        print(f"  总记录数: {total_records}", file=sys.stderr)
+        
+        if verbose and total_records > 0:
+            # 按资源管理器统计
+            print("  资源管理器统计:", file=sys.stderr)
+            for rmgr_name, count in sorted(self.rmgr_stats.items()):
+                print(f"    {rmgr_name}: {count}", file=sys.stderr)
+            
+            # 显示LSN范围
+            first_lsn = LSN(self.first_record.xl_prev_raw)
+            last_lsn = LSN(self.last_record.xl_prev_raw + self.last_record.xl_tot_len)
             print(f"  LSN范围: {first_lsn} - {last_lsn}", file=sys.stderr)
 
 
@@ -159,27 +285,22 @@ def print_text_statistics(records, text_parser: WALTextParser):
         print(f"  LSN范围: {lsn_range['start']} - {lsn_range['end']}", file=sys.stderr)
 
 
-def filter_records(wal_file: WALFile, rmgr_id: int = None, xid: int = None):
+def filter_records_iter(records: Iterable[XLogRecord], rmgr_id: int = None,
+                        xid: int = None) -> Iterator[XLogRecord]:
     """
-    根据条件过滤记录
+    根据条件流式过滤记录
     
     Args:
-        wal_file: WAL文件对象
+        records: XLOG记录的可迭代对象
         rmgr_id: 资源管理器ID过滤器
         xid: 事务ID过滤器
         
-    Returns:
-        过滤后的记录列表
+    Yields:
+        匹配的记录
     """
-    records = wal_file.records
-    
-    if rmgr_id is not None:
-        records = [r for r in records if r.xl_rmid == rmgr_id]
-    
-    if xid is not None:
-        records = [r for r in records if r.xl_xid == xid]
-    
-    return records
+    for r in records:
+        if (rmgr_id is None or r.xl_rmid == rmgr_id) and (xid is None or r.xl_xid == xid):
+            yield r
 
 
 def main():
@@ -207,11 +328,8 @@ def main():
             text_records = text_parser.parse_text_file(args.wal_file)
             
             # 过滤记录
-            if args.rmgr is not None:
-                text_records = text_parser.filter_by_rmgr_id(text_records, args.rmgr)
-            
-            if args.xid is not None:
-                text_records = text_parser.filter_by_tx_id(text_records, args.xid)
+            if args.rmgr is not None or args.xid is not None:
+                text_records = text_parser.filter(text_records, rmgr_id=args.rmgr, tx_id=args.xid)
             
             if args.verbose:
                 print_text_statistics(text_records, text_parser)
@@ -220,37 +338,39 @@ def main():
                 print("警告: 没有找到匹配的记录", file=sys.stderr)
                 return
             
-            # 生成SQL语句
+            # 生成SQL语句并写出
             formatter = SQLFormatter()
-            sql_statements = formatter.format_text_records(text_records)
+            with open_output(args.output) as out:
+                chunks = formatter.iter_text_records_sql(text_records)
+                if not args.output:
+                    chunks = chain(chunks, ("\n",))
+                write_sql_chunks(out, chunks)
+            if args.output and args.verbose:
+                print(f"SQL语句已写入文件: {args.output}", file=sys.stderr)
             
         else:
-            # 解析二进制格式WAL文件
+            # 流式解析二进制格式WAL文件：解析、统计、过滤和SQL输出在同一条迭代链上进行
             wal_file = WALFile(args.wal_file)
-            wal_file.parse()
-            
-            # 过滤记录
-            records = filter_records(wal_file, args.rmgr, args.xid)
-            
-            if args.verbose:
-                print_statistics(wal_file, args.verbose)
+            stats = RecordStatistics()
+            records = filter_records_iter(stats.track(wal_file.iter_records()), args.rmgr, args.xid)
             
-            if not records:
-                print("警告: 没有找到匹配的记录", file=sys.stderr)
-                return
-            
-            # 生成SQL语句
-            formatter = SQLFormatter()
-            sql_statements = formatter.format_records(records)
-        
-        # 输出结果
-        if args.output:
-            with open(args.output, 'w', encoding='utf-8') as f:
-                f.write(sql_statements)
-            if args.verbose:
-                print(f"SQL语句已写入文件: {args.output}", file=sys.stderr)
-        else:
-            print(sql_statements)
+            try:
+                first_record = next(records, None)
+                if first_record is None:
+                    print("警告: 没有找到匹配的记录", file=sys.stderr)
+                    return
+                
+                # 生成SQL语句并逐条输出
+                formatter = SQLFormatter()
+                records = chain((first_record,), records)
+                with open_output(args.output) as out:
+                    write_sql_chunks(out, formatter.iter_records_sql(records))
+                if args.output and args.verbose:
+                    print(f"SQL语句已写入文件: {args.output}", file=sys.stderr)
+            finally:
+                # 记录流耗尽后统计才完整
+                if args.verbose:
+                    stats.print(wal_file.file_path, args.verbose)
     
     except Exception as e:
         print(f"错误: 解析WAL文件时发生异常: {e}", file=sys.stderr)
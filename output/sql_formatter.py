@@ -3,9 +3,94 @@ SQL格式化输出模块
 负责将WAL记录转换为可执行的SQL语句
 """
 
-from typing import List, Dict, Any, Optional, TextIO
-from datetime import datetime
-from core.wal_parser import XLogRecord, get_rmgr_name
+import io
+import time
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Sequence, TextIO
+from collections import defaultdict
+from core.wal_parser import XLogRecord, RMGR_NAMES, get_rmgr_name
+
+# 输出文件头的标题行与生成时间格式
+_HEADER_TITLE = "-- WALExplorer生成的SQL语句\n"
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# SQL字符串字面量转义表：单引号双写，去掉NUL字符
+_SQL_ESCAPE = str.maketrans({"'": "''", "\x00": ""})
+
+# 简化实现的模拟行数据，返回给调用方的是副本
+_STUB_INSERT_DATA = {'column1': 'value1', 'column2': 'value2'}
+_STUB_MULTI_INSERT_DATA = (
+    {'column1': 'value1', 'column2': 'value2'},
+    {'column1': 'value3', 'column2': 'value4'},
+)
+
+# DDL类记录的info -> (语句标签, 是否带对象名)；不带对象名的操作只输出注释
+_DATABASE_LABELS = {
+    0x00: ("CREATE DATABASE", True),
+    0x10: ("DROP DATABASE", True),
+    0x20: ("ALTER DATABASE", False),
+}
+
+_TABLESPACE_LABELS = {
+    0x00: ("CREATE TABLESPACE", True),
+    0x10: ("DROP TABLESPACE", True),
+}
+
+_SEQUENCE_LABELS = {
+    0x00: ("CREATE SEQUENCE", True),  # 序列创建
+    0x10: ("序列值更新", False),
+    0x20: ("DROP SEQUENCE", True),    # 序列删除
+}
+
+
+# 文本记录描述关键字 -> SQL语句，按判断优先级排列
+_HEAP_TEXT_SQL = (
+    # 模拟INSERT/UPDATE/DELETE语句
+    ('insert', "INSERT INTO user_table (id, name, email) VALUES (1, 'John Doe', 'john@example.com');"),
+    ('update', "UPDATE user_table SET name = 'Updated Name' WHERE id = 1;"),
+    ('delete', "DELETE FROM user_table WHERE id = 1;"),
+)
+
+_HEAP2_TEXT_SQL = (
+    ('multi_insert', "INSERT INTO user_table (id, name) VALUES (1, 'User1'), (2, 'User2');"),
+    ('freeze', "-- VACUUM FREEZE操作"),
+    ('visible', "-- VACUUM标记可见性操作"),
+)
+
+_TRANSACTION_TEXT_SQL = (
+    ('commit', "COMMIT;  -- 事务ID: {}"),
+    ('abort', "ROLLBACK;  -- 事务ID: {}"),
+)
+
+_DATABASE_TEXT_SQL = (
+    ('create', "CREATE DATABASE test_database;"),
+    ('drop', "DROP DATABASE test_database;"),
+    ('alter', "ALTER DATABASE test_database SET ...;"),
+)
+
+_TABLESPACE_TEXT_SQL = (
+    ('create', "CREATE TABLESPACE test_tablespace LOCATION '/path/to/tablespace';"),
+    ('drop', "DROP TABLESPACE test_tablespace;"),
+)
+
+
+def _match_keyword(description: str, table) -> Optional[str]:
+    """
+    在描述中按优先级查找关键字
+    
+    描述只转换一次小写，依次做子串判断，返回第一个命中关键字对应的SQL。
+    
+    Args:
+        description: 记录描述
+        table: (关键字, SQL) 元组序列
+        
+    Returns:
+        命中关键字对应的SQL，未命中返回None
+    """
+    desc = description.lower()
+    for keyword, sql in table:
+        if keyword in desc:
+            return sql
+    return None
 
 
 class SQLFormatter:
@@ -14,79 +99,158 @@ class SQLFormatter:
     将WAL记录转换为SQL语句
     """
     
+    __slots__ = ('transaction_stack', 'current_xid')
+    
     def __init__(self):
         """
         初始化SQL格式化器
         """
-        self.transaction_stack = []  # 事务栈
+        self.transaction_stack: Dict[int, None] = {}  # 事务栈（按入栈顺序保存的xid）
         self.current_xid = None      # 当前事务ID
     
-    def format_records(self, records: List[XLogRecord]) -> str:
+    def format_records(self, records: List[XLogRecord], out: Optional[TextIO] = None) -> Optional[str]:
         """
         格式化记录列表为SQL语句
         
+        每条记录的SQL直接写入输出流，不再先收集全部行再拼接。
+        
         Args:
             records: XLOG记录列表
+            out: 输出文本流，为None时写入内存缓冲并返回字符串
             
         Returns:
-            格式化的SQL语句字符串
+            未指定out时返回格式化的SQL语句字符串，否则返回None
         """
-        sql_lines = []
+        buffer = io.StringIO() if out is None else None
+        write = (buffer or out).write
         
         # 添加文件头注释
-        sql_lines.append("-- WALExplorer生成的SQL语句")
-        sql_lines.append(f"-- 生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        sql_lines.append(f"-- 记录数量: {len(records)}")
-        sql_lines.append("")
+        write(self._emit_header(len(records)))
         
+        format_record = self.format_record
         for record in records:
-            sql_statements = self.format_record(record)
+            sql_statements = format_record(record)
             if sql_statements:
-                sql_lines.extend(sql_statements)
-                sql_lines.append("")  # 空行分隔
+                # 空行分隔
+                write("\n")
+                write("\n".join(sql_statements))
+                write("\n")
         
-        return "\n".join(sql_lines)
+        return buffer.getvalue() if buffer is not None else None
     
-    def format_text_records(self, records) -> str:
+    def _emit_header(self, record_count: Optional[int] = None) -> str:
+        """
+        生成输出文件头注释
+        
+        Args:
+            record_count: 记录数量，为None时不输出记录数量行
+            
+        Returns:
+            文件头注释文本，每行以换行结尾
+        """
+        header = _HEADER_TITLE + f"-- 生成时间: {time.strftime(_TIMESTAMP_FORMAT)}\n"
+        if record_count is not None:
+            header += f"-- 记录数量: {record_count}\n"
+        return header
+    
+    def format_records_stream(self, records: Iterable[XLogRecord], out: TextIO):
+        """
+        流式格式化记录并逐条写入输出流
+        
+        每条记录生成的SQL立即写出，不在内存中拼接完整结果；
+        由于记录总数在写完之前未知，记录数量注释写在末尾。
+        
+        Args:
+            records: XLOG记录的可迭代对象
+            out: 输出文本流
+        """
+        out.writelines(self.iter_records_sql(records))
+    
+    def iter_records_sql(self, records: Iterable[XLogRecord]) -> Iterator[str]:
+        """
+        逐段产出记录对应的SQL文本
+        
+        每条记录产出一段以空行结尾的文本，首尾分别是文件头注释和记录数量注释，
+        各段直接拼接即为format_records_stream的输出。
+        
+        Args:
+            records: XLOG记录的可迭代对象
+            
+        Yields:
+            SQL文本片段
+        """
+        yield self._emit_header() + "\n"
+        
+        format_record = self.format_record
+        count = 0
+        for record in records:
+            count += 1
+            sql_statements = format_record(record)
+            if sql_statements:
+                yield "\n".join(sql_statements) + "\n\n"  # 空行分隔
+        
+        yield f"-- 记录数量: {count}\n"
+    
+    def format_text_records(self, records, out: Optional[TextIO] = None) -> Optional[str]:
         """
         格式化文本记录列表为SQL语句
         
         Args:
             records: 文本格式的WAL记录列表
+            out: 输出文本流，为None时写入内存缓冲并返回字符串
             
         Returns:
-            格式化的SQL语句字符串
+            未指定out时返回格式化的SQL语句字符串，否则返回None
         """
-        sql_lines = []
+        if out is not None:
+            self.format_text_records_stream(records, out)
+            return None
         
+        buffer = io.StringIO()
+        self.format_text_records_stream(records, buffer)
+        return buffer.getvalue()
+    
+    def format_text_records_stream(self, records, out: TextIO):
+        """
+        格式化文本记录列表并按事务逐段写入输出流
+        
+        输出内容与format_text_records完全相同，但不在内存中拼接完整结果。
+        
+        Args:
+            records: 文本格式的WAL记录列表
+            out: 输出文本流
+        """
+        out.writelines(self.iter_text_records_sql(records))
+    
+    def iter_text_records_sql(self, records) -> Iterator[str]:
+        """
+        逐段产出文本记录对应的SQL文本
+        
+        首段为文件头注释，之后每个事务一段，各段直接拼接即为format_text_records的输出。
+        
+        Args:
+            records: 文本格式的WAL记录列表
+            
+        Yields:
+            SQL文本片段
+        """
         # 添加文件头注释
-        sql_lines.append("-- WALExplorer生成的SQL语句")
-        sql_lines.append(f"-- 生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        sql_lines.append(f"-- 记录数量: {len(records)}")
-        sql_lines.append("")
+        yield self._emit_header(len(records))
         
-        # 按事务分组
-        tx_groups = {}
+        # 按事务分组，系统事务（tx_id为0）的记录不参与输出，分组时直接跳过
+        tx_groups = defaultdict(list)
         for record in records:
-            if record.tx_id not in tx_groups:
-                tx_groups[record.tx_id] = []
-            tx_groups[record.tx_id].append(record)
+            if record.tx_id:
+                tx_groups[record.tx_id].append(record)
         
         # 为每个事务生成SQL
         for tx_id, tx_records in tx_groups.items():
-            if tx_id != 0:  # 跳过系统事务
-                sql_lines.append(f"-- 事务 {tx_id}")
-                sql_lines.append("BEGIN;")
-                
-                for record in tx_records:
-                    sql_statements = self.format_text_record(record)
-                    if sql_statements:
-                        sql_lines.extend(sql_statements)
-                
-                sql_lines.append("COMMIT;")
-                sql_lines.append("")
-        
-        return "\n".join(sql_lines)
+            tx_lines = ["", f"-- 事务 {tx_id}", "BEGIN;"]
+            
+            tx_lines.extend(self._format_text_record_batch(tx_records))
+            
+            tx_lines.append("COMMIT;\n")
+            yield "\n".join(tx_lines)
     
     def format_record(self, record: XLogRecord) -> List[str]:
         """
@@ -98,66 +262,61 @@ class SQLFormatter:
         Returns:
             SQL语句列表
         """
-        rmgr_name = get_rmgr_name(record.xl_rmid)
+        rmid = record.xl_rmid
+        # xl_rmid为uint8，越界值只可能来自手工构造的记录
+        rmgr_name = RMGR_NAMES[rmid] if 0 <= rmid < 256 else get_rmgr_name(rmid)
+        
+        info = record.info
         
         # 处理事务开始和结束
-        if self._handle_transaction_boundaries(record):
+        if self._handle_transaction_boundaries(record, info):
             return []
         
         # 根据资源管理器类型处理记录
-        if rmgr_name == 'Heap':
-            return self._format_heap_record(record)
-        elif rmgr_name == 'Heap2':
-            return self._format_heap2_record(record)
-        elif rmgr_name == 'Transaction':
-            return self._format_transaction_record(record)
-        elif rmgr_name == 'Database':
-            return self._format_database_record(record)
-        elif rmgr_name == 'Tablespace':
-            return self._format_tablespace_record(record)
-        elif rmgr_name == 'Sequence':
-            return self._format_sequence_record(record)
-        else:
-            # 其他类型的记录，生成注释
-            return self._format_generic_record(record, rmgr_name)
-    
-    def _handle_transaction_boundaries(self, record: XLogRecord) -> bool:
+        method_name = self._RMGR_DISPATCH.get(rmgr_name)
+        if method_name is not None:
+            return getattr(self, method_name)(record, info)
+        
+        # 其他类型的记录，生成注释
+        return self._format_generic_record(record, rmgr_name)
+    
+    def _handle_transaction_boundaries(self, record: XLogRecord, info: int) -> bool:
         """
         处理事务边界
         
         Args:
             record: XLOG记录
+            info: 记录的info值（低4位）
             
         Returns:
             如果是事务边界记录返回True
         """
         # 检查是否是事务开始或提交记录
         if record.xl_rmid == 1:  # Transaction RMGR
-            info = record.get_info()
-            
             # 事务开始
             if info == 0x00:  # XLOG_XACT_COMMIT
                 if record.xl_xid not in self.transaction_stack:
-                    self.transaction_stack.append(record.xl_xid)
+                    self.transaction_stack[record.xl_xid] = None
                     self.current_xid = record.xl_xid
                 return True
             
             # 事务提交
             elif info == 0x10:  # XLOG_XACT_ABORT
                 if record.xl_xid in self.transaction_stack:
-                    self.transaction_stack.remove(record.xl_xid)
+                    del self.transaction_stack[record.xl_xid]
                     if self.current_xid == record.xl_xid:
-                        self.current_xid = self.transaction_stack[-1] if self.transaction_stack else None
+                        self.current_xid = next(reversed(self.transaction_stack), None)
                 return True
         
         return False
     
-    def _format_heap_record(self, record: XLogRecord) -> List[str]:
+    def _format_heap_record(self, record: XLogRecord, info: int) -> List[str]:
         """
         格式化Heap记录（DML操作）
         
         Args:
             record: Heap记录
+            info: 记录的info值（低4位）
             
         Returns:
             SQL语句列表
@@ -165,45 +324,36 @@ class SQLFormatter:
         if not record.blocks:
             return ["-- Heap记录无块数据"]
         
-        sql_lines = []
-        info = record.get_info()
-        
         # 根据info字段判断操作类型
-        if info == 0x00:  # INSERT
-            sql_lines.extend(self._format_insert(record))
-        elif info == 0x01:  # DELETE
-            sql_lines.extend(self._format_delete(record))
-        elif info == 0x02:  # UPDATE
-            sql_lines.extend(self._format_update(record))
-        else:
-            sql_lines.append(f"-- 未知的Heap操作类型: {info}")
-        
-        return sql_lines
+        method_name = self._HEAP_OPS.get(info)
+        if method_name is not None:
+            return getattr(self, method_name)(record)
+        return [f"-- 未知的Heap操作类型: {info}"]
     
-    def _format_heap2_record(self, record: XLogRecord) -> List[str]:
+    def _format_heap2_record(self, record: XLogRecord, info: int) -> List[str]:
         """
         格式化Heap2记录（多版本并发控制相关）
         
         Args:
             record: Heap2记录
+            info: 记录的info值（低4位）
             
         Returns:
             SQL语句列表
         """
-        sql_lines = []
-        info = record.get_info()
-        
         # Heap2记录包含一些特殊的DML操作
-        if info == 0x00:  # HEAP2_MULTI_INSERT
-            sql_lines.extend(self._format_multi_insert(record))
-        elif info == 0x01:  # HEAP2_FREEZE
-            sql_lines.append("-- VACUUM FREEZE操作")
-        elif info == 0x02:  # HEAP2_VISIBLE
-            sql_lines.append("-- VACUUM标记可见性操作")
-        else:
-            sql_lines.append(f"-- 未知的Heap2操作类型: {info}")
-        
-        return sql_lines
+        method_name = self._HEAP2_OPS.get(info)
+        if method_name is not None:
+            return getattr(self, method_name)(record)
+        return [f"-- 未知的Heap2操作类型: {info}"]
+    
+    def _format_freeze(self, record: XLogRecord) -> List[str]:
+        """格式化HEAP2_FREEZE操作"""
+        return ["-- VACUUM FREEZE操作"]
+    
+    def _format_visible(self, record: XLogRecord) -> List[str]:
+        """格式化HEAP2_VISIBLE操作"""
+        return ["-- VACUUM标记可见性操作"]
     
     def _format_insert(self, record: XLogRecord) -> List[str]:
         """
@@ -215,8 +365,6 @@ class SQLFormatter:
         Returns:
             INSERT SQL语句列表
         """
-        sql_lines = []
-        
         # 尝试从块数据中提取表信息
         table_info = self._extract_table_info(record)
         if not table_info:
@@ -229,13 +377,27 @@ class SQLFormatter:
         if not data:
             return ["-- 无法解析INSERT操作的数据"]
         
-        # 生成INSERT语句
-        columns = ", ".join(data.keys())
-        values = ", ".join([f"'{v}'" if isinstance(v, str) else str(v) for v in data.values()])
+        # 生成INSERT语句（一次遍历拆出列名与值）
+        columns, values = zip(*data.items())
         
-        sql_lines.append(f"INSERT INTO {table_name} ({columns}) VALUES ({values});")
+        return [f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                f"VALUES ({', '.join(map(self._fmt_value, values))});"]
+    
+    def _fmt_value(self, value: Any) -> str:
+        """
+        将字段值格式化为SQL字面量
         
-        return sql_lines
+        Args:
+            value: 字段值
+            
+        Returns:
+            SQL字面量，字符串会加引号并转义
+        """
+        if value is None:
+            return "NULL"
+        if isinstance(value, str):
+            return "'" + value.translate(_SQL_ESCAPE) + "'"
+        return str(value)
     
     def _format_delete(self, record: XLogRecord) -> List[str]:
         """
@@ -247,8 +409,6 @@ class SQLFormatter:
         Returns:
             DELETE SQL语句列表
         """
-        sql_lines = []
-        
         table_info = self._extract_table_info(record)
         if not table_info:
             return ["-- 无法解析DELETE操作的表信息"]
@@ -260,9 +420,7 @@ class SQLFormatter:
         if not where_clause:
             return ["-- 无法解析DELETE操作的WHERE条件"]
         
-        sql_lines.append(f"DELETE FROM {table_name} WHERE {where_clause};")
-        
-        return sql_lines
+        return [f"DELETE FROM {table_name} WHERE {where_clause};"]
     
     def _format_update(self, record: XLogRecord) -> List[str]:
         """
@@ -274,8 +432,6 @@ class SQLFormatter:
         Returns:
             UPDATE SQL语句列表
         """
-        sql_lines = []
-        
         table_info = self._extract_table_info(record)
         if not table_info:
             return ["-- 无法解析UPDATE操作的表信息"]
@@ -292,9 +448,7 @@ class SQLFormatter:
         if not where_clause:
             return ["-- 无法解析UPDATE操作的WHERE条件"]
         
-        sql_lines.append(f"UPDATE {table_name} SET {set_clause} WHERE {where_clause};")
-        
-        return sql_lines
+        return [f"UPDATE {table_name} SET {set_clause} WHERE {where_clause};"]
     
     def _format_multi_insert(self, record: XLogRecord) -> List[str]:
         """
@@ -306,8 +460,6 @@ class SQLFormatter:
         Returns:
             多行INSERT SQL语句列表
         """
-        sql_lines = []
-        
         table_info = self._extract_table_info(record)
         if not table_info:
             return ["-- 无法解析多行INSERT操作的表信息"]
@@ -319,117 +471,102 @@ class SQLFormatter:
         if not rows_data:
             return ["-- 无法解析多行INSERT操作的数据"]
         
-        # 生成多行INSERT语句
-        if rows_data:
-            columns = ", ".join(rows_data[0].keys())
-            values_list = []
-            
-            for row in rows_data:
-                values = ", ".join([f"'{v}'" if isinstance(v, str) else str(v) for v in row.values()])
-                values_list.append(f"({values})")
-            
-            sql_lines.append(f"INSERT INTO {table_name} ({columns}) VALUES {', '.join(values_list)};")
+        # 生成多行INSERT语句（各行字段顺序与首行一致，列名只计算一次）
+        columns = ", ".join(rows_data[0].keys())
+        values = ", ".join(
+            "(" + ", ".join(map(self._fmt_value, row.values())) + ")"
+            for row in rows_data
+        )
         
-        return sql_lines
+        return [f"INSERT INTO {table_name} ({columns}) VALUES {values};"]
     
-    def _format_transaction_record(self, record: XLogRecord) -> List[str]:
+    def _format_transaction_record(self, record: XLogRecord, info: int) -> List[str]:
         """
         格式化事务记录
         
         Args:
             record: 事务记录
+            info: 记录的info值（低4位）
             
         Returns:
             事务相关SQL语句列表
         """
-        sql_lines = []
-        info = record.get_info()
-        
-        if info == 0x00:  # XLOG_XACT_COMMIT
-            sql_lines.append(f"COMMIT;  -- 事务ID: {record.xl_xid}")
-        elif info == 0x10:  # XLOG_XACT_ABORT
-            sql_lines.append(f"ROLLBACK;  -- 事务ID: {record.xl_xid}")
-        else:
-            sql_lines.append(f"-- 未知事务操作: {info}")
-        
-        return sql_lines
+        method_name = self._TRANSACTION_OPS.get(info)
+        if method_name is not None:
+            return getattr(self, method_name)(record)
+        return [f"-- 未知事务操作: {info}"]
+    
+    def _format_commit(self, record: XLogRecord) -> List[str]:
+        """格式化XLOG_XACT_COMMIT"""
+        return [f"COMMIT;  -- 事务ID: {record.xl_xid}"]
+    
+    def _format_abort(self, record: XLogRecord) -> List[str]:
+        """格式化XLOG_XACT_ABORT"""
+        return [f"ROLLBACK;  -- 事务ID: {record.xl_xid}"]
     
-    def _format_database_record(self, record: XLogRecord) -> List[str]:
+    def _format_database_record(self, record: XLogRecord, info: int) -> List[str]:
         """
         格式化数据库记录（DDL操作）
         
         Args:
             record: 数据库记录
+            info: 记录的info值（低4位）
             
         Returns:
             数据库DDL语句列表
         """
-        sql_lines = []
-        info = record.get_info()
-        
         # 根据info字段判断数据库操作类型
-        if info == 0x00:  # CREATE DATABASE
-            db_name = self._extract_database_name(record)
-            sql_lines.append(f"CREATE DATABASE {db_name or 'unknown_db'};")
-        elif info == 0x10:  # DROP DATABASE
-            db_name = self._extract_database_name(record)
-            sql_lines.append(f"DROP DATABASE {db_name or 'unknown_db'};")
-        elif info == 0x20:  # ALTER DATABASE
-            sql_lines.append("-- ALTER DATABASE操作")
-        else:
-            sql_lines.append(f"-- 未知的数据库操作: {info}")
-        
-        return sql_lines
+        entry = _DATABASE_LABELS.get(info)
+        if entry is None:
+            return [f"-- 未知的数据库操作: {info}"]
+        
+        label, needs_name = entry
+        if not needs_name:
+            return [f"-- {label}操作"]
+        db_name = self._extract_database_name(record)
+        return [f"{label} {db_name or 'unknown_db'};"]
     
-    def _format_tablespace_record(self, record: XLogRecord) -> List[str]:
+    def _format_tablespace_record(self, record: XLogRecord, info: int) -> List[str]:
         """
         格式化表空间记录（DDL操作）
         
         Args:
             record: 表空间记录
+            info: 记录的info值（低4位）
             
         Returns:
             表空间DDL语句列表
         """
-        sql_lines = []
-        info = record.get_info()
-        
-        if info == 0x00:  # CREATE TABLESPACE
-            tablespace_name = self._extract_tablespace_name(record)
-            sql_lines.append(f"CREATE TABLESPACE {tablespace_name or 'unknown_tablespace'};")
-        elif info == 0x10:  # DROP TABLESPACE
-            tablespace_name = self._extract_tablespace_name(record)
-            sql_lines.append(f"DROP TABLESPACE {tablespace_name or 'unknown_tablespace'};")
-        else:
-            sql_lines.append(f"-- 未知的表空间操作: {info}")
+        entry = _TABLESPACE_LABELS.get(info)
+        if entry is None:
+            return [f"-- 未知的表空间操作: {info}"]
         
-        return sql_lines
+        label, needs_name = entry
+        if not needs_name:
+            return [f"-- {label}操作"]
+        tablespace_name = self._extract_tablespace_name(record)
+        return [f"{label} {tablespace_name or 'unknown_tablespace'};"]
     
-    def _format_sequence_record(self, record: XLogRecord) -> List[str]:
+    def _format_sequence_record(self, record: XLogRecord, info: int) -> List[str]:
         """
         格式化序列记录
         
         Args:
             record: 序列记录
+            info: 记录的info值（低4位）
             
         Returns:
             序列相关SQL语句列表
         """
-        sql_lines = []
-        info = record.get_info()
-        
-        if info == 0x00:  # 序列创建
-            seq_name = self._extract_sequence_name(record)
-            sql_lines.append(f"CREATE SEQUENCE {seq_name or 'unknown_sequence'};")
-        elif info == 0x10:  # 序列值更新
-            sql_lines.append("-- 序列值更新操作")
-        elif info == 0x20:  # 序列删除
-            seq_name = self._extract_sequence_name(record)
-            sql_lines.append(f"DROP SEQUENCE {seq_name or 'unknown_sequence'};")
-        else:
-            sql_lines.append(f"-- 未知的序列操作: {info}")
+        entry = _SEQUENCE_LABELS.get(info)
+        if entry is None:
+            return [f"-- 未知的序列操作: {info}"]
         
-        return sql_lines
+        label, needs_name = entry
+        if not needs_name:
+            return [f"-- {label}操作"]
+        seq_name = self._extract_sequence_name(record)
+        return [f"{label} {seq_name or 'unknown_sequence'};"]
     
     def _format_generic_record(self, record: XLogRecord, rmgr_name: str) -> List[str]:
         """
@@ -442,14 +579,13 @@ class SQLFormatter:
         Returns:
             注释行列表
         """
-        sql_lines = []
-        sql_lines.append(f"-- {rmgr_name} 记录")
-        sql_lines.append(f"--   事务ID: {record.xl_xid}")
-        sql_lines.append(f"--   记录长度: {record.xl_tot_len}")
-        sql_lines.append(f"--   信息标志: 0x{record.xl_info:02x}")
-        sql_lines.append(f"--   前一个LSN: {record.xl_prev}")
-        
-        return sql_lines
+        return [
+            f"-- {rmgr_name} 记录",
+            f"--   事务ID: {record.xl_xid}",
+            f"--   记录长度: {record.xl_tot_len}",
+            f"--   信息标志: 0x{record.xl_info:02x}",
+            f"--   前一个LSN: {record.xl_prev}",
+        ]
     
     # 以下方法用于从WAL记录中提取具体信息
     # 这些是简化版本，实际实现需要根据PostgreSQL的WAL格式进行详细解析
@@ -467,12 +603,12 @@ class SQLFormatter:
         # 简化实现，实际需要解析关系文件节点
         if record.blocks:
             block = record.blocks[0]
-            if 'relfilenode' in block:
-                relnode = block['relfilenode']
+            relnode = block.relfilenode
+            if relnode is not None:
                 # 这里应该有从relfilenode到表名的映射
                 # 暂时返回一个模拟的表名
                 return {
-                    'table_name': f'table_{relnode["relNode"]}',
+                    'table_name': f'table_{relnode.relNode}',
                     'schema': 'public',
                     'relfilenode': relnode
                 }
@@ -489,7 +625,7 @@ class SQLFormatter:
             插入的数据字典
         """
         # 简化实现，实际需要解析tuple数据
-        return {'column1': 'value1', 'column2': 'value2'}
+        return _STUB_INSERT_DATA.copy()
     
     def _extract_where_clause(self, record: XLogRecord) -> Optional[str]:
         """
@@ -517,7 +653,7 @@ class SQLFormatter:
         # 简化实现
         return "column1 = 'new_value'"
     
-    def _extract_multi_insert_data(self, record: XLogRecord) -> List[Dict[str, Any]]:
+    def _extract_multi_insert_data(self, record: XLogRecord) -> Sequence[Dict[str, Any]]:
         """
         从多行INSERT记录中提取数据
         
@@ -528,10 +664,7 @@ class SQLFormatter:
             多行数据列表
         """
         # 简化实现
-        return [
-            {'column1': 'value1', 'column2': 'value2'},
-            {'column1': 'value3', 'column2': 'value4'}
-        ]
+        return [row.copy() for row in _STUB_MULTI_INSERT_DATA]
     
     def _extract_database_name(self, record: XLogRecord) -> Optional[str]:
         """
@@ -582,28 +715,56 @@ class SQLFormatter:
         Returns:
             SQL语句列表
         """
-        sql_lines = []
-        
         # 根据资源管理器和描述判断操作类型
-        if record.rmgr == 'Heap':
-            sql_lines.extend(self._format_heap_text_record(record))
-        elif record.rmgr == 'Heap2':
-            sql_lines.extend(self._format_heap2_text_record(record))
-        elif record.rmgr == 'Transaction':
-            sql_lines.extend(self._format_transaction_text_record(record))
-        elif record.rmgr == 'Database':
-            sql_lines.extend(self._format_database_text_record(record))
-        elif record.rmgr == 'Tablespace':
-            sql_lines.extend(self._format_tablespace_text_record(record))
-        else:
-            # 其他类型的记录，生成注释
-            sql_lines.append(f"-- {record.rmgr} 记录")
-            sql_lines.append(f"--   事务ID: {record.tx_id}")
-            sql_lines.append(f"--   LSN: {record.lsn}")
-            sql_lines.append(f"--   描述: {record.description}")
+        method_name = self._TEXT_RMGR_DISPATCH.get(record.rmgr)
+        if method_name is not None:
+            return getattr(self, method_name)(record)
+        
+        # 其他类型的记录，生成注释
+        return self._format_generic_text_record(record)
+    
+    def _format_text_record_batch(self, records: Iterable) -> List[str]:
+        """
+        格式化一个事务内的全部文本记录
         
+        事务内的记录通常成段属于同一资源管理器，只在资源管理器变化时重新
+        查找处理方法，段内记录直接调用。
+        
+        Args:
+            records: 同一事务的文本记录
+            
+        Returns:
+            SQL语句列表
+        """
+        get_method_name = self._TEXT_RMGR_DISPATCH.get
+        sql_lines = []
+        extend = sql_lines.extend
+        last_rmgr = handler = None
+        for record in records:
+            rmgr = record.rmgr
+            if rmgr != last_rmgr:
+                handler = getattr(self, get_method_name(rmgr, '_format_generic_text_record'))
+                last_rmgr = rmgr
+            extend(handler(record))
         return sql_lines
     
+    def _format_generic_text_record(self, record) -> List[str]:
+        """
+        格式化其他类型的文本记录（生成注释）
+        
+        Args:
+            record: 文本记录
+            
+        Returns:
+            注释行列表
+        """
+        return [
+            f"-- {record.rmgr} 记录",
+            f"--   事务ID: {record.tx_id}",
+            f"--   LSN: {record.lsn}",
+            f"--   描述: {record.description}",
+        ]
+    
     def _format_heap_text_record(self, record) -> List[str]:
         """
         格式化Heap文本记录
@@ -614,22 +775,10 @@ class SQLFormatter:
         Returns:
             SQL语句列表
         """
-        sql_lines = []
-        desc = record.description.lower()
-        
-        if 'insert' in desc:
-            # 模拟INSERT语句
-            sql_lines.append("INSERT INTO user_table (id, name, email) VALUES (1, 'John Doe', 'john@example.com');")
-        elif 'update' in desc:
-            # 模拟UPDATE语句
-            sql_lines.append("UPDATE user_table SET name = 'Updated Name' WHERE id = 1;")
-        elif 'delete' in desc:
-            # 模拟DELETE语句
-            sql_lines.append("DELETE FROM user_table WHERE id = 1;")
-        else:
-            sql_lines.append(f"-- Heap操作: {record.description}")
-        
-        return sql_lines
+        sql = _match_keyword(record.description, _HEAP_TEXT_SQL)
+        if sql is None:
+            return [f"-- Heap操作: {record.description}"]
+        return [sql]
     
     def _format_heap2_text_record(self, record) -> List[str]:
         """
@@ -641,19 +790,10 @@ class SQLFormatter:
         Returns:
             SQL语句列表
         """
-        sql_lines = []
-        desc = record.description.lower()
-        
-        if 'multi_insert' in desc:
-            sql_lines.append("INSERT INTO user_table (id, name) VALUES (1, 'User1'), (2, 'User2');")
-        elif 'freeze' in desc:
-            sql_lines.append("-- VACUUM FREEZE操作")
-        elif 'visible' in desc:
-            sql_lines.append("-- VACUUM标记可见性操作")
-        else:
-            sql_lines.append(f"-- Heap2操作: {record.description}")
-        
-        return sql_lines
+        sql = _match_keyword(record.description, _HEAP2_TEXT_SQL)
+        if sql is None:
+            return [f"-- Heap2操作: {record.description}"]
+        return [sql]
     
     def _format_transaction_text_record(self, record) -> List[str]:
         """
@@ -665,17 +805,10 @@ class SQLFormatter:
         Returns:
             SQL语句列表
         """
-        sql_lines = []
-        desc = record.description.lower()
-        
-        if 'commit' in desc:
-            sql_lines.append(f"COMMIT;  -- 事务ID: {record.tx_id}")
-        elif 'abort' in desc:
-            sql_lines.append(f"ROLLBACK;  -- 事务ID: {record.tx_id}")
-        else:
-            sql_lines.append(f"-- 事务操作: {record.description}")
-        
-        return sql_lines
+        sql = _match_keyword(record.description, _TRANSACTION_TEXT_SQL)
+        if sql is None:
+            return [f"-- 事务操作: {record.description}"]
+        return [sql.format(record.tx_id)]
     
     def _format_database_text_record(self, record) -> List[str]:
         """
@@ -687,19 +820,10 @@ class SQLFormatter:
         Returns:
             SQL语句列表
         """
-        sql_lines = []
-        desc = record.description.lower()
-        
-        if 'create' in desc:
-            sql_lines.append("CREATE DATABASE test_database;")
-        elif 'drop' in desc:
-            sql_lines.append("DROP DATABASE test_database;")
-        elif 'alter' in desc:
-            sql_lines.append("ALTER DATABASE test_database SET ...;")
-        else:
-            sql_lines.append(f"-- 数据库操作: {record.description}")
-        
-        return sql_lines
+        sql = _match_keyword(record.description, _DATABASE_TEXT_SQL)
+        if sql is None:
+            return [f"-- 数据库操作: {record.description}"]
+        return [sql]
     
     def _format_tablespace_text_record(self, record) -> List[str]:
         """
@@ -711,14 +835,44 @@ class SQLFormatter:
         Returns:
             SQL语句列表
         """
-        sql_lines = []
-        desc = record.description.lower()
-        
-        if 'create' in desc:
-            sql_lines.append("CREATE TABLESPACE test_tablespace LOCATION '/path/to/tablespace';")
-        elif 'drop' in desc:
-            sql_lines.append("DROP TABLESPACE test_tablespace;")
-        else:
-            sql_lines.append(f"-- 表空间操作: {record.description}")
-        
-        return sql_lines
+        sql = _match_keyword(record.description, _TABLESPACE_TEXT_SQL)
+        if sql is None:
+            return [f"-- 表空间操作: {record.description}"]
+        return [sql]
+    
+    # 各资源管理器的info -> 格式化方法名
+    _HEAP_OPS = {
+        0x00: '_format_insert',   # INSERT
+        0x01: '_format_delete',   # DELETE
+        0x02: '_format_update',   # UPDATE
+    }
+    
+    _HEAP2_OPS = {
+        0x00: '_format_multi_insert',  # HEAP2_MULTI_INSERT
+        0x01: '_format_freeze',        # HEAP2_FREEZE
+        0x02: '_format_visible',       # HEAP2_VISIBLE
+    }
+    
+    _TRANSACTION_OPS = {
+        0x00: '_format_commit',  # XLOG_XACT_COMMIT
+        0x10: '_format_abort',   # XLOG_XACT_ABORT
+    }
+    
+    # 资源管理器名称 -> 格式化方法名，按名称在实例上查找，子类重写的方法同样生效
+    _RMGR_DISPATCH = {
+        'Heap': '_format_heap_record',
+        'Heap2': '_format_heap2_record',
+        'Transaction': '_format_transaction_record',
+        'Database': '_format_database_record',
+        'Tablespace': '_format_tablespace_record',
+        'Sequence': '_format_sequence_record',
+    }
+    
+    # 文本记录的资源管理器名称 -> 格式化方法名
+    _TEXT_RMGR_DISPATCH = {
+        'Heap': '_format_heap_text_record',
+        'Heap2': '_format_heap2_text_record',
+        'Transaction': '_format_transaction_text_record',
+        'Database': '_format_database_text_record',
+        'Tablespace': '_format_tablespace_text_record',
+    }
@@ -3,9 +3,21 @@ DDL记录解析器
 负责解析PostgreSQL的DDL操作记录，提取数据定义语句信息
 """
 
-from typing import Dict, Any, List, Optional
+from array import array
+from operator import attrgetter, itemgetter
+from typing import Dict, Any, Iterable, List, Optional
 from utils.binary_reader import BinaryReader
-from core.wal_parser import XLogRecord
+from core.wal_parser import BlockRef, XLogRecord
+
+
+# 取块引用的关系文件节点
+_get_relfilenode = attrgetter('relfilenode')
+_get_column_name_type = itemgetter('name', 'type')
+
+# DDL信息对象的默认字段值，所有对象共享同一字符串
+_DEFAULT_SCHEMA = "public"
+_DROP_RESTRICT = "RESTRICT"
+_DEFAULT_INDEX_TYPE = "btree"
 
 
 class DDLInfo:
@@ -13,9 +25,12 @@ class DDLInfo:
     DDL操作信息基类
     """
     
+    __slots__ = ('operation_type', 'schema_name', 'object_name', 'object_oid', 'sql_statement',
+                 'is_system_object')
+    
     def __init__(self, operation_type: str):
         self.operation_type = operation_type
-        self.schema_name = "public"
+        self.schema_name = _DEFAULT_SCHEMA
         self.object_name = ""
         self.object_oid = 0
         self.sql_statement = ""
@@ -27,6 +42,8 @@ class CreateTableInfo(DDLInfo):
     创建表操作信息
     """
     
+    __slots__ = ('table_name', 'columns', 'constraints', 'tablespace_name', 'owner')
+    
     def __init__(self):
         super().__init__("CREATE TABLE")
         self.table_name = ""
@@ -41,10 +58,12 @@ class DropTableInfo(DDLInfo):
     删除表操作信息
     """
     
+    __slots__ = ('table_name', 'drop_behavior')
+    
     def __init__(self):
         super().__init__("DROP TABLE")
         self.table_name = ""
-        self.drop_behavior = "RESTRICT"  # RESTRICT 或 CASCADE
+        self.drop_behavior = _DROP_RESTRICT  # RESTRICT 或 CASCADE
 
 
 class AlterTableInfo(DDLInfo):
@@ -52,6 +71,8 @@ class AlterTableInfo(DDLInfo):
     修改表操作信息
     """
     
+    __slots__ = ('table_name', 'alter_actions')
+    
     def __init__(self):
         super().__init__("ALTER TABLE")
         self.table_name = ""
@@ -63,12 +84,14 @@ class CreateIndexInfo(DDLInfo):
     创建索引操作信息
     """
     
+    __slots__ = ('index_name', 'table_name', 'columns', 'index_type', 'unique', 'concurrently')
+    
     def __init__(self):
         super().__init__("CREATE INDEX")
         self.index_name = ""
         self.table_name = ""
         self.columns = []
-        self.index_type = "btree"
+        self.index_type = _DEFAULT_INDEX_TYPE
         self.unique = False
         self.concurrently = False
 
@@ -78,10 +101,12 @@ class DropIndexInfo(DDLInfo):
     删除索引操作信息
     """
     
+    __slots__ = ('index_name', 'drop_behavior')
+    
     def __init__(self):
         super().__init__("DROP INDEX")
         self.index_name = ""
-        self.drop_behavior = "RESTRICT"
+        self.drop_behavior = _DROP_RESTRICT
 
 
 class CreateSchemaInfo(DDLInfo):
@@ -89,6 +114,8 @@ class CreateSchemaInfo(DDLInfo):
     创建模式操作信息
     """
     
+    __slots__ = ('owner',)
+    
     def __init__(self):
         super().__init__("CREATE SCHEMA")
         self.schema_name = ""
@@ -100,10 +127,12 @@ class DropSchemaInfo(DDLInfo):
     删除模式操作信息
     """
     
+    __slots__ = ('drop_behavior',)
+    
     def __init__(self):
         super().__init__("DROP SCHEMA")
         self.schema_name = ""
-        self.drop_behavior = "RESTRICT"
+        self.drop_behavior = _DROP_RESTRICT
 
 
 class DatabaseInfo(DDLInfo):
@@ -111,6 +140,8 @@ class DatabaseInfo(DDLInfo):
     数据库操作信息
     """
     
+    __slots__ = ('database_name', 'owner', 'tablespace_name', 'options')
+    
     def __init__(self, operation_type: str):
         super().__init__(operation_type)
         self.database_name = ""
@@ -124,6 +155,8 @@ class TablespaceInfo(DDLInfo):
     表空间操作信息
     """
     
+    __slots__ = ('tablespace_name', 'owner', 'location')
+    
     def __init__(self, operation_type: str):
         super().__init__(operation_type)
         self.tablespace_name = ""
@@ -131,6 +164,57 @@ class TablespaceInfo(DDLInfo):
         self.location = ""
 
 
+# 生成SQL的缓存键：只包含影响SQL文本的字段，结构相同的DDL操作得到相同的键
+def _create_table_key(table_info: CreateTableInfo) -> tuple:
+    return (table_info.table_name,
+            tuple((column['name'], column['type'], bool(column.get('not_null', False)))
+                  for column in table_info.columns))
+
+
+def _alter_table_key(table_info: AlterTableInfo) -> tuple:
+    return (table_info.table_name,
+            tuple((action['action'], action.get('column_name'), action.get('column_type'))
+                  for action in table_info.alter_actions))
+
+
+def _create_index_key(index_info: CreateIndexInfo) -> tuple:
+    return (index_info.index_name, index_info.table_name, tuple(index_info.columns),
+            bool(index_info.unique), bool(index_info.concurrently))
+
+
+# 生成SQL缓存的最大条目数，超过后整体清空
+_SQL_CACHE_SIZE = 4096
+
+
+class DDLBatch:
+    """
+    DDL解析结果列式表
+    按列保存批量解析得到的DDL操作，便于只按操作类型或记录位置筛选而不逐个访问对象
+    """
+    
+    __slots__ = ('record_indices', 'operation_types', 'infos')
+    
+    def __init__(self):
+        self.record_indices = array('I')  # DDL记录在输入记录序列中的下标
+        self.operation_types = []         # 操作类型，如 "CREATE TABLE"
+        self.infos = []                   # 完整的DDL操作信息，生成SQL时使用
+    
+    def __len__(self) -> int:
+        return len(self.infos)
+    
+    def append(self, record_index: int, ddl_info: DDLInfo):
+        """
+        追加一条DDL操作
+        
+        Args:
+            record_index: 记录在输入序列中的下标
+            ddl_info: DDL操作信息
+        """
+        self.record_indices.append(record_index)
+        self.operation_types.append(ddl_info.operation_type)
+        self.infos.append(ddl_info)
+
+
 class DDLParser:
     """
     DDL记录解析器
@@ -163,8 +247,71 @@ class DDLParser:
             1214: 'pg_database',   # pg_database OID
         }
         
-        # 事务状态跟踪
-        self.pending_ddl_operations = {}
+        # 系统表OID集合，用于热路径上的成员判断
+        self._system_oids = frozenset(self.system_tables)
+        
+        # 事务状态跟踪，首次访问时才创建
+        self._pending_ddl_operations = None
+        
+        # (类型, 缓存键) -> 已生成的SQL
+        self._sql_cache: Dict[tuple, str] = {}
+        
+        # 资源管理器ID -> 解析方法
+        self._rmid_dispatch = {
+            4: self._parse_database_record,     # Database
+            5: self._parse_tablespace_record,   # Tablespace
+            10: self._parse_heap_ddl_record,    # Heap
+            11: self._parse_btree_ddl_record,   # Btree
+        }
+        
+        # Heap记录涉及的系统表OID -> 解析方法
+        self._heap_handler_map = {
+            1247: self._parse_pg_class_operation,      # pg_class
+            1249: self._parse_pg_attribute_operation,  # pg_attribute
+            2606: self._parse_pg_index_operation,      # pg_index
+        }
+        
+        # 各类记录的info -> 解析方法
+        self._database_ops = {
+            0x00: self._parse_create_database,  # CREATE DATABASE
+            0x10: self._parse_drop_database,    # DROP DATABASE
+            0x20: self._parse_alter_database,   # ALTER DATABASE
+        }
+        self._tablespace_ops = {
+            0x00: self._parse_create_tablespace,  # CREATE TABLESPACE
+            0x10: self._parse_drop_tablespace,    # DROP TABLESPACE
+            0x20: self._parse_alter_tablespace,   # ALTER TABLESPACE
+        }
+        self._btree_ops = {
+            0x00: self._parse_create_index,  # CREATE INDEX
+            0x10: self._parse_drop_index,    # DROP INDEX
+        }
+        self._pg_class_ops = {
+            0x00: self._parse_pg_class_insert,  # INSERT - 创建表
+            0x10: self._parse_pg_class_delete,  # DELETE - 删除表
+            0x20: self._parse_pg_class_update,  # UPDATE - 修改表
+        }
+        self._pg_attribute_ops = {
+            0x00: self._parse_pg_attribute_insert,  # INSERT - 添加列
+            0x10: self._parse_pg_attribute_delete,  # DELETE - 删除列
+        }
+        self._pg_index_ops = {
+            0x00: self._parse_pg_index_insert,  # INSERT - 创建索引
+            0x10: self._parse_pg_index_delete,  # DELETE - 删除索引
+        }
+    
+    @property
+    def pending_ddl_operations(self) -> Dict[int, Any]:
+        """
+        事务中尚未提交的DDL操作
+        """
+        if self._pending_ddl_operations is None:
+            self._pending_ddl_operations = {}
+        return self._pending_ddl_operations
+    
+    @pending_ddl_operations.setter
+    def pending_ddl_operations(self, value: Dict[int, Any]) -> None:
+        self._pending_ddl_operations = value
     
     def parse_ddl_record(self, record: XLogRecord) -> Optional[DDLInfo]:
         """
@@ -176,244 +323,319 @@ class DDLParser:
         Returns:
             DDL操作信息
         """
-        # 检查是否是系统表操作
-        if not self._is_system_table_operation(record):
+        return self._parse_record(record)
+    
+    def _parse_record(self, record: XLogRecord) -> Optional[DDLInfo]:
+        """
+        按资源管理器和系统表分发解析单条记录，供单条和批量解析共用
+        
+        Args:
+            record: XLOG记录
+            
+        Returns:
+            DDL操作信息，非DDL记录返回None
+        """
+        # 先按资源管理器类型过滤，非DDL相关的记录不需要扫描块
+        handler = self._rmid_dispatch.get(record.xl_rmid)
+        if handler is None:
             return None
         
-        # 根据资源管理器类型解析
-        if record.xl_rmid == 4:  # Database
-            return self._parse_database_record(record)
-        elif record.xl_rmid == 5:  # Tablespace
-            return self._parse_tablespace_record(record)
-        elif record.xl_rmid == 10:  # Heap
-            return self._parse_heap_ddl_record(record)
-        elif record.xl_rmid == 11:  # Btree
-            return self._parse_btree_ddl_record(record)
-        else:
+        # 检查是否是系统表操作，命中的系统表OID传给后续解析以免再扫描一遍块
+        blocks = record.blocks
+        system_oid = self._find_system_table_oid(blocks)
+        if not system_oid:
             return None
+        
+        return handler(record, blocks, record.info, system_oid)
     
-    def _is_system_table_operation(self, record: XLogRecord) -> bool:
+    def parse_records(self, records: Iterable[XLogRecord]) -> List[DDLInfo]:
         """
-        检查是否是系统表操作
+        批量解析DDL记录
+        
+        与逐条调用parse_ddl_record结果相同，循环内用到的方法在循环外只取一次。
         
         Args:
-            record: XLOG记录
+            records: XLOG记录的可迭代对象
             
         Returns:
-            如果是系统表操作返回True
+            DDL操作信息列表，非DDL记录被跳过
         """
-        if not record.blocks:
-            return False
+        results = []
+        append = results.append
+        parse = self._parse_record
+        for record in records:
+            ddl_info = parse(record)
+            if ddl_info is not None:
+                append(ddl_info)
+        return results
+    
+    def parse_batch(self, records: Iterable[XLogRecord]) -> DDLBatch:
+        """
+        批量解析DDL记录
         
-        for block in record.blocks:
-            if 'relfilenode' in block:
-                relnode = block['relfilenode']
-                if relnode['relNode'] in self.system_tables:
-                    return True
+        Args:
+            records: XLOG记录的可迭代对象
+            
+        Returns:
+            只包含DDL记录的列式结果表
+        """
+        batch = DDLBatch()
+        parse = self._parse_record
+        append = batch.append
+        for index, record in enumerate(records):
+            ddl_info = parse(record)
+            if ddl_info is not None:
+                append(index, ddl_info)
+        return batch
+    
+    def _find_system_table_oid(self, blocks: List[BlockRef]) -> int:
+        """
+        查找记录操作的系统表
         
-        return False
+        Args:
+            blocks: 记录的块引用列表
+            
+        Returns:
+            按块顺序第一个命中的系统表OID，不是系统表操作时返回0
+        """
+        system_oids = self._system_oids
+        for relnode in map(_get_relfilenode, blocks):
+            if relnode is not None and relnode.relNode in system_oids:
+                return relnode.relNode
+        return 0
     
-    def _parse_database_record(self, record: XLogRecord) -> Optional[DatabaseInfo]:
+    def _parse_database_record(self, record: XLogRecord, blocks: List[BlockRef], info: int, system_oid: int) -> Optional[DatabaseInfo]:
         """
         解析数据库记录
         
         Args:
             record: 数据库记录
+            blocks: 记录的块引用列表
+            info: 记录的info值（低4位）
+            system_oid: 第一个命中的系统表OID
             
         Returns:
             数据库操作信息
         """
-        info = record.get_info()
-        
-        if info == 0x00:  # CREATE DATABASE
-            db_info = DatabaseInfo("CREATE DATABASE")
-            db_info.database_name = self._extract_database_name(record)
-            db_info.owner = self._extract_database_owner(record)
-            db_info.tablespace_name = self._extract_database_tablespace(record)
-            return db_info
-        elif info == 0x10:  # DROP DATABASE
-            db_info = DatabaseInfo("DROP DATABASE")
-            db_info.database_name = self._extract_database_name(record)
-            return db_info
-        elif info == 0x20:  # ALTER DATABASE
-            db_info = DatabaseInfo("ALTER DATABASE")
-            db_info.database_name = self._extract_database_name(record)
-            db_info.options = self._extract_database_options(record)
-            return db_info
-        else:
-            return None
-    
-    def _parse_tablespace_record(self, record: XLogRecord) -> Optional[TablespaceInfo]:
+        handler = self._database_ops.get(info)
+        return handler(record) if handler is not None else None
+    
+    def _parse_create_database(self, record: XLogRecord) -> DatabaseInfo:
+        """解析CREATE DATABASE"""
+        db_info = DatabaseInfo("CREATE DATABASE")
+        db_info.database_name = self._extract_database_name(record)
+        db_info.owner = self._extract_database_owner(record)
+        db_info.tablespace_name = self._extract_database_tablespace(record)
+        return db_info
+    
+    def _parse_drop_database(self, record: XLogRecord) -> DatabaseInfo:
+        """解析DROP DATABASE"""
+        db_info = DatabaseInfo("DROP DATABASE")
+        db_info.database_name = self._extract_database_name(record)
+        return db_info
+    
+    def _parse_alter_database(self, record: XLogRecord) -> DatabaseInfo:
+        """解析ALTER DATABASE"""
+        db_info = DatabaseInfo("ALTER DATABASE")
+        db_info.database_name = self._extract_database_name(record)
+        db_info.options = self._extract_database_options(record)
+        return db_info
+    
+    def _parse_tablespace_record(self, record: XLogRecord, blocks: List[BlockRef], info: int, system_oid: int) -> Optional[TablespaceInfo]:
         """
         解析表空间记录
         
         Args:
             record: 表空间记录
+            blocks: 记录的块引用列表
+            info: 记录的info值（低4位）
+            system_oid: 第一个命中的系统表OID
             
         Returns:
             表空间操作信息
         """
-        info = record.get_info()
-        
-        if info == 0x00:  # CREATE TABLESPACE
-            ts_info = TablespaceInfo("CREATE TABLESPACE")
-            ts_info.tablespace_name = self._extract_tablespace_name(record)
-            ts_info.owner = self._extract_tablespace_owner(record)
-            ts_info.location = self._extract_tablespace_location(record)
-            return ts_info
-        elif info == 0x10:  # DROP TABLESPACE
-            ts_info = TablespaceInfo("DROP TABLESPACE")
-            ts_info.tablespace_name = self._extract_tablespace_name(record)
-            return ts_info
-        elif info == 0x20:  # ALTER TABLESPACE
-            ts_info = TablespaceInfo("ALTER TABLESPACE")
-            ts_info.tablespace_name = self._extract_tablespace_name(record)
-            return ts_info
-        else:
-            return None
-    
-    def _parse_heap_ddl_record(self, record: XLogRecord) -> Optional[DDLInfo]:
+        handler = self._tablespace_ops.get(info)
+        return handler(record) if handler is not None else None
+    
+    def _parse_create_tablespace(self, record: XLogRecord) -> TablespaceInfo:
+        """解析CREATE TABLESPACE"""
+        ts_info = TablespaceInfo("CREATE TABLESPACE")
+        ts_info.tablespace_name = self._extract_tablespace_name(record)
+        ts_info.owner = self._extract_tablespace_owner(record)
+        ts_info.location = self._extract_tablespace_location(record)
+        return ts_info
+    
+    def _parse_drop_tablespace(self, record: XLogRecord) -> TablespaceInfo:
+        """解析DROP TABLESPACE"""
+        ts_info = TablespaceInfo("DROP TABLESPACE")
+        ts_info.tablespace_name = self._extract_tablespace_name(record)
+        return ts_info
+    
+    def _parse_alter_tablespace(self, record: XLogRecord) -> TablespaceInfo:
+        """解析ALTER TABLESPACE"""
+        ts_info = TablespaceInfo("ALTER TABLESPACE")
+        ts_info.tablespace_name = self._extract_tablespace_name(record)
+        return ts_info
+    
+    def _parse_heap_ddl_record(self, record: XLogRecord, blocks: List[BlockRef], info: int, system_oid: int) -> Optional[DDLInfo]:
         """
         解析Heap DDL记录
         
         Args:
             record: Heap记录
+            blocks: 记录的块引用列表
+            info: 记录的info值（低4位）
+            system_oid: 第一个命中的系统表OID
             
         Returns:
             DDL操作信息
         """
-        if not record.blocks:
-            return None
-        
-        # 检查是否是pg_class操作
-        for block in record.blocks:
-            if 'relfilenode' in block:
-                relnode = block['relfilenode']
-                if relnode['relNode'] == 1247:  # pg_class
-                    return self._parse_pg_class_operation(record)
-                elif relnode['relNode'] == 1249:  # pg_attribute
-                    return self._parse_pg_attribute_operation(record)
-                elif relnode['relNode'] == 2606:  # pg_index
-                    return self._parse_pg_index_operation(record)
+        handler_map = self._heap_handler_map
+        handler = handler_map.get(system_oid)
+        if handler is not None:
+            return handler(record, info)
+        
+        # 第一个系统表不是pg_class/pg_attribute/pg_index时，才按块顺序继续查找
+        for relnode in map(_get_relfilenode, blocks):
+            if relnode is not None:
+                handler = handler_map.get(relnode.relNode)
+                if handler is not None:
+                    return handler(record, info)
         
         return None
     
-    def _parse_btree_ddl_record(self, record: XLogRecord) -> Optional[DDLInfo]:
+    def _parse_btree_ddl_record(self, record: XLogRecord, blocks: List[BlockRef], info: int, system_oid: int) -> Optional[DDLInfo]:
         """
         解析Btree DDL记录（索引相关）
         
         Args:
             record: Btree记录
+            blocks: 记录的块引用列表
+            info: 记录的info值（低4位）
+            system_oid: 第一个命中的系统表OID
             
         Returns:
             DDL操作信息
         """
-        info = record.get_info()
-        
-        if info == 0x00:  # CREATE INDEX
-            index_info = CreateIndexInfo()
-            index_info.index_name = self._extract_index_name(record)
-            index_info.table_name = self._extract_index_table_name(record)
-            index_info.columns = self._extract_index_columns(record)
-            index_info.unique = self._is_unique_index(record)
-            return index_info
-        elif info == 0x10:  # DROP INDEX
-            index_info = DropIndexInfo()
-            index_info.index_name = self._extract_index_name(record)
-            return index_info
-        else:
-            return None
-    
-    def _parse_pg_class_operation(self, record: XLogRecord) -> Optional[DDLInfo]:
+        handler = self._btree_ops.get(info)
+        return handler(record) if handler is not None else None
+    
+    def _parse_create_index(self, record: XLogRecord) -> CreateIndexInfo:
+        """解析CREATE INDEX"""
+        index_info = CreateIndexInfo()
+        index_info.index_name = self._extract_index_name(record)
+        index_info.table_name = self._extract_index_table_name(record)
+        index_info.columns = self._extract_index_columns(record)
+        index_info.unique = self._is_unique_index(record)
+        return index_info
+    
+    def _parse_drop_index(self, record: XLogRecord) -> DropIndexInfo:
+        """解析DROP INDEX"""
+        index_info = DropIndexInfo()
+        index_info.index_name = self._extract_index_name(record)
+        return index_info
+    
+    def _parse_pg_class_operation(self, record: XLogRecord, info: int) -> Optional[DDLInfo]:
         """
         解析pg_class操作
         
         Args:
             record: pg_class操作记录
+            info: 记录的info值（低4位）
             
         Returns:
             DDL操作信息
         """
-        info = record.get_info()
-        
-        if info == 0x00:  # INSERT - 创建表
-            table_info = CreateTableInfo()
-            table_info.table_name = self._extract_table_name_from_pg_class(record)
-            table_info.columns = self._extract_table_columns(record)
-            table_info.constraints = self._extract_table_constraints(record)
-            return table_info
-        elif info == 0x10:  # DELETE - 删除表
-            table_info = DropTableInfo()
-            table_info.table_name = self._extract_table_name_from_pg_class(record)
-            return table_info
-        elif info == 0x20:  # UPDATE - 修改表
-            table_info = AlterTableInfo()
-            table_info.table_name = self._extract_table_name_from_pg_class(record)
-            table_info.alter_actions = self._extract_alter_actions(record)
-            return table_info
-        else:
-            return None
-    
-    def _parse_pg_attribute_operation(self, record: XLogRecord) -> Optional[DDLInfo]:
+        handler = self._pg_class_ops.get(info)
+        return handler(record) if handler is not None else None
+    
+    def _parse_pg_class_insert(self, record: XLogRecord) -> CreateTableInfo:
+        """解析pg_class插入（创建表）"""
+        table_info = CreateTableInfo()
+        table_info.table_name = self._extract_table_name_from_pg_class(record)
+        table_info.columns = self._extract_table_columns(record)
+        table_info.constraints = self._extract_table_constraints(record)
+        return table_info
+    
+    def _parse_pg_class_delete(self, record: XLogRecord) -> DropTableInfo:
+        """解析pg_class删除（删除表）"""
+        table_info = DropTableInfo()
+        table_info.table_name = self._extract_table_name_from_pg_class(record)
+        return table_info
+    
+    def _parse_pg_class_update(self, record: XLogRecord) -> AlterTableInfo:
+        """解析pg_class更新（修改表）"""
+        table_info = AlterTableInfo()
+        table_info.table_name = self._extract_table_name_from_pg_class(record)
+        table_info.alter_actions = self._extract_alter_actions(record)
+        return table_info
+    
+    def _parse_pg_attribute_operation(self, record: XLogRecord, info: int) -> Optional[DDLInfo]:
         """
         解析pg_attribute操作
         
         Args:
             record: pg_attribute操作记录
+            info: 记录的info值（低4位）
             
         Returns:
             DDL操作信息
         """
-        info = record.get_info()
-        
-        if info == 0x00:  # INSERT - 添加列
-            table_info = AlterTableInfo()
-            table_info.table_name = self._extract_table_name_from_pg_attribute(record)
-            table_info.alter_actions = [
-                {
-                    'action': 'ADD COLUMN',
-                    'column_name': self._extract_column_name(record),
-                    'column_type': self._extract_column_type(record)
-                }
-            ]
-            return table_info
-        elif info == 0x10:  # DELETE - 删除列
-            table_info = AlterTableInfo()
-            table_info.table_name = self._extract_table_name_from_pg_attribute(record)
-            table_info.alter_actions = [
-                {
-                    'action': 'DROP COLUMN',
-                    'column_name': self._extract_column_name(record)
-                }
-            ]
-            return table_info
-        else:
-            return None
+        handler = self._pg_attribute_ops.get(info)
+        return handler(record) if handler is not None else None
+    
+    def _parse_pg_attribute_insert(self, record: XLogRecord) -> AlterTableInfo:
+        """解析pg_attribute插入（添加列）"""
+        table_info = AlterTableInfo()
+        table_info.table_name = self._extract_table_name_from_pg_attribute(record)
+        table_info.alter_actions = [
+            {
+                'action': 'ADD COLUMN',
+                'column_name': self._extract_column_name(record),
+                'column_type': self._extract_column_type(record)
+            }
+        ]
+        return table_info
+    
+    def _parse_pg_attribute_delete(self, record: XLogRecord) -> AlterTableInfo:
+        """解析pg_attribute删除（删除列）"""
+        table_info = AlterTableInfo()
+        table_info.table_name = self._extract_table_name_from_pg_attribute(record)
+        table_info.alter_actions = [
+            {
+                'action': 'DROP COLUMN',
+                'column_name': self._extract_column_name(record)
+            }
+        ]
+        return table_info
     
-    def _parse_pg_index_operation(self, record: XLogRecord) -> Optional[DDLInfo]:
+    def _parse_pg_index_operation(self, record: XLogRecord, info: int) -> Optional[DDLInfo]:
         """
         解析pg_index操作
         
         Args:
             record: pg_index操作记录
+            info: 记录的info值（低4位）
             
         Returns:
             DDL操作信息
         """
-        info = record.get_info()
-        
-        if info == 0x00:  # INSERT - 创建索引
-            index_info = CreateIndexInfo()
-            index_info.index_name = self._extract_index_name_from_pg_index(record)
-            index_info.table_name = self._extract_index_table_name_from_pg_index(record)
-            index_info.columns = self._extract_index_columns_from_pg_index(record)
-            return index_info
-        elif info == 0x10:  # DELETE - 删除索引
-            index_info = DropIndexInfo()
-            index_info.index_name = self._extract_index_name_from_pg_index(record)
-            return index_info
-        else:
-            return None
+        handler = self._pg_index_ops.get(info)
+        return handler(record) if handler is not None else None
+    
+    def _parse_pg_index_insert(self, record: XLogRecord) -> CreateIndexInfo:
+        """解析pg_index插入（创建索引）"""
+        index_info = CreateIndexInfo()
+        index_info.index_name = self._extract_index_name_from_pg_index(record)
+        index_info.table_name = self._extract_index_table_name_from_pg_index(record)
+        index_info.columns = self._extract_index_columns_from_pg_index(record)
+        return index_info
+    
+    def _parse_pg_index_delete(self, record: XLogRecord) -> DropIndexInfo:
+        """解析pg_index删除（删除索引）"""
+        index_info = DropIndexInfo()
+        index_info.index_name = self._extract_index_name_from_pg_index(record)
+        return index_info
     
     # 以下方法用于从WAL记录中提取具体信息
     # 这些是简化版本，实际实现需要根据PostgreSQL的WAL格式进行详细解析
@@ -515,115 +737,168 @@ class DDLParser:
         Returns:
             SQL语句
         """
-        if isinstance(ddl_info, CreateTableInfo):
-            return self._generate_create_table_sql(ddl_info)
-        elif isinstance(ddl_info, DropTableInfo):
-            return self._generate_drop_table_sql(ddl_info)
-        elif isinstance(ddl_info, AlterTableInfo):
-            return self._generate_alter_table_sql(ddl_info)
-        elif isinstance(ddl_info, CreateIndexInfo):
-            return self._generate_create_index_sql(ddl_info)
-        elif isinstance(ddl_info, DropIndexInfo):
-            return self._generate_drop_index_sql(ddl_info)
-        elif isinstance(ddl_info, DatabaseInfo):
-            return self._generate_database_sql(ddl_info)
-        elif isinstance(ddl_info, TablespaceInfo):
-            return self._generate_tablespace_sql(ddl_info)
-        else:
-            return f"-- Unknown DDL operation: {ddl_info.operation_type}"
+        cls = type(ddl_info)
+        sql_gen = self._SQL_GEN
+        entry = sql_gen.get(cls)
+        if entry is None:
+            # 子类按最近的已知基类处理，与isinstance判断一致
+            base = next((base for base in cls.__mro__ if base in sql_gen), None)
+            if base is None:
+                return f"-- Unknown DDL operation: {ddl_info.operation_type}"
+            cls, entry = base, sql_gen[base]
+        
+        # 按方法名在实例上查找，子类重写的生成方法同样生效
+        method_name, key_func = entry
+        if key_func is None:
+            # 没有缓存键函数的类型每次直接生成
+            return getattr(self, method_name)(ddl_info)
+        
+        # 结构相同的DDL操作直接复用已生成的SQL
+        key = (cls, key_func(ddl_info))
+        cache = self._sql_cache
+        sql = cache.get(key)
+        if sql is None:
+            sql = getattr(self, method_name)(ddl_info)
+            if len(cache) >= _SQL_CACHE_SIZE:
+                cache.clear()
+            cache[key] = sql
+        return sql
+    
+    def generate_sql_batch(self, batch: DDLBatch) -> List[str]:
+        """
+        为批量解析结果逐条生成SQL语句
+        
+        Args:
+            batch: parse_batch返回的列式结果表
+            
+        Returns:
+            与batch中各条DDL操作一一对应的SQL语句列表
+        """
+        generate = self.generate_sql_statement
+        return [generate(ddl_info) for ddl_info in batch.infos]
+    
+    def parse_to_sql(self, record: XLogRecord) -> Optional[str]:
+        """
+        解析DDL记录并直接生成SQL语句
+        
+        Args:
+            record: XLOG记录
+            
+        Returns:
+            SQL语句，非DDL记录返回None
+        """
+        ddl_info = self._parse_record(record)
+        return self.generate_sql_statement(ddl_info) if ddl_info is not None else None
+    
+    def parse_records_to_sql(self, records: Iterable[XLogRecord]) -> List[str]:
+        """
+        批量解析DDL记录并直接生成SQL语句
+        
+        与parse_records后逐条调用generate_sql_statement结果相同，但不保留中间的DDL信息列表。
+        
+        Args:
+            records: XLOG记录的可迭代对象
+            
+        Returns:
+            SQL语句列表，非DDL记录被跳过
+        """
+        results = []
+        append = results.append
+        parse = self._parse_record
+        generate = self.generate_sql_statement
+        for record in records:
+            ddl_info = parse(record)
+            if ddl_info is not None:
+                append(generate(ddl_info))
+        return results
     
     def _generate_create_table_sql(self, table_info: CreateTableInfo) -> str:
         """生成CREATE TABLE SQL"""
-        columns_sql = []
-        for column in table_info.columns:
-            col_sql = f"{column['name']} {column['type']}"
-            if column.get('not_null', False):
-                col_sql += " NOT NULL"
-            columns_sql.append(col_sql)
+        columns = table_info.columns
+        columns_sql = ",\n".join(
+            f"    {name} {column_type}"
+            f"{' NOT NULL' if column.get('not_null', False) else ''}"
+            for (name, column_type), column in zip(map(_get_column_name_type, columns), columns)
+        )
         
-        sql = f"CREATE TABLE {table_info.table_name} (\n"
-        sql += ",\n".join(f"    {col}" for col in columns_sql)
-        sql += "\n);"
-        
-        return sql
+        return f"CREATE TABLE {table_info.table_name} (\n{columns_sql}\n);"
     
     def _generate_drop_table_sql(self, table_info: DropTableInfo) -> str:
         """生成DROP TABLE SQL"""
-        sql = f"DROP TABLE {table_info.table_name}"
-        if table_info.drop_behavior == "CASCADE":
-            sql += " CASCADE"
-        sql += ";"
-        
-        return sql
+        cascade = " CASCADE" if table_info.drop_behavior == "CASCADE" else ""
+        return f"DROP TABLE {table_info.table_name}{cascade};"
     
     def _generate_alter_table_sql(self, table_info: AlterTableInfo) -> str:
         """生成ALTER TABLE SQL"""
-        sql = f"ALTER TABLE {table_info.table_name}"
+        parts = [f"ALTER TABLE {table_info.table_name}"]
         
         for action in table_info.alter_actions:
             if action['action'] == 'ADD COLUMN':
-                sql += f"\n  ADD COLUMN {action['column_name']} {action['column_type']}"
+                parts.append(f"\n  ADD COLUMN {action['column_name']} {action['column_type']}")
             elif action['action'] == 'DROP COLUMN':
-                sql += f"\n  DROP COLUMN {action['column_name']}"
+                parts.append(f"\n  DROP COLUMN {action['column_name']}")
         
-        sql += ";"
+        parts.append(";")
         
-        return sql
+        return "".join(parts)
     
     def _generate_create_index_sql(self, index_info: CreateIndexInfo) -> str:
         """生成CREATE INDEX SQL"""
-        sql = "CREATE "
-        if index_info.unique:
-            sql += "UNIQUE "
-        if index_info.concurrently:
-            sql += "CONCURRENTLY "
-        
-        sql += f"INDEX {index_info.index_name} ON {index_info.table_name}"
-        sql += f" ({', '.join(index_info.columns)});"
+        unique = "UNIQUE " if index_info.unique else ""
+        concurrently = "CONCURRENTLY " if index_info.concurrently else ""
         
-        return sql
+        return (f"CREATE {unique}{concurrently}INDEX {index_info.index_name} "
+                f"ON {index_info.table_name} ({', '.join(index_info.columns)});")
     
     def _generate_drop_index_sql(self, index_info: DropIndexInfo) -> str:
         """生成DROP INDEX SQL"""
-        sql = f"DROP INDEX {index_info.index_name}"
-        if index_info.drop_behavior == "CASCADE":
-            sql += " CASCADE"
-        sql += ";"
-        
-        return sql
+        cascade = " CASCADE" if index_info.drop_behavior == "CASCADE" else ""
+        return f"DROP INDEX {index_info.index_name}{cascade};"
     
     def _generate_database_sql(self, db_info: DatabaseInfo) -> str:
         """生成数据库SQL"""
         if db_info.operation_type == "CREATE DATABASE":
-            sql = f"CREATE DATABASE {db_info.database_name}"
+            parts = [f"CREATE DATABASE {db_info.database_name}"]
             if db_info.owner:
-                sql += f" OWNER {db_info.owner}"
+                parts.append(f" OWNER {db_info.owner}")
             if db_info.tablespace_name:
-                sql += f" TABLESPACE {db_info.tablespace_name}"
-            sql += ";"
+                parts.append(f" TABLESPACE {db_info.tablespace_name}")
+            parts.append(";")
+            return "".join(parts)
         elif db_info.operation_type == "DROP DATABASE":
-            sql = f"DROP DATABASE {db_info.database_name};"
+            return f"DROP DATABASE {db_info.database_name};"
         elif db_info.operation_type == "ALTER DATABASE":
-            sql = f"ALTER DATABASE {db_info.database_name};"
+            return f"ALTER DATABASE {db_info.database_name};"
         else:
-            sql = f"-- Unknown database operation: {db_info.operation_type}"
-        
-        return sql
+            return f"-- Unknown database operation: {db_info.operation_type}"
     
     def _generate_tablespace_sql(self, ts_info: TablespaceInfo) -> str:
         """生成表空间SQL"""
         if ts_info.operation_type == "CREATE TABLESPACE":
-            sql = f"CREATE TABLESPACE {ts_info.tablespace_name}"
+            parts = [f"CREATE TABLESPACE {ts_info.tablespace_name}"]
             if ts_info.owner:
-                sql += f" OWNER {ts_info.owner}"
+                parts.append(f" OWNER {ts_info.owner}")
             if ts_info.location:
-                sql += f" LOCATION '{ts_info.location}'"
-            sql += ";"
+                parts.append(f" LOCATION '{ts_info.location}'")
+            parts.append(";")
+            return "".join(parts)
         elif ts_info.operation_type == "DROP TABLESPACE":
-            sql = f"DROP TABLESPACE {ts_info.tablespace_name};"
+            return f"DROP TABLESPACE {ts_info.tablespace_name};"
         elif ts_info.operation_type == "ALTER TABLESPACE":
-            sql = f"ALTER TABLESPACE {ts_info.tablespace_name};"
+            return f"ALTER TABLESPACE {ts_info.tablespace_name};"
         else:
-            sql = f"-- Unknown tablespace operation: {ts_info.operation_type}"
-        
-        return sql
\ No newline at end of file
+            return f"-- Unknown tablespace operation: {ts_info.operation_type}"
+    
+    # DDL信息类型 -> (SQL生成方法名, 缓存键函数)，类加载时建立一次；
+    # 子类可以扩展该表，缓存键函数为None时不缓存生成结果
+    _SQL_GEN = {
+        CreateTableInfo: ('_generate_create_table_sql', _create_table_key),
+        DropTableInfo: ('_generate_drop_table_sql', attrgetter('table_name', 'drop_behavior')),
+        AlterTableInfo: ('_generate_alter_table_sql', _alter_table_key),
+        CreateIndexInfo: ('_generate_create_index_sql', _create_index_key),
+        DropIndexInfo: ('_generate_drop_index_sql', attrgetter('index_name', 'drop_behavior')),
+        DatabaseInfo: ('_generate_database_sql',
+                       attrgetter('operation_type', 'database_name', 'owner', 'tablespace_name')),
+        TablespaceInfo: ('_generate_tablespace_sql',
+                         attrgetter('operation_type', 'tablespace_name', 'owner', 'location')),
+    }
@@ -4,16 +4,170 @@ Heap记录解析器
 """
 
 import struct
+from functools import lru_cache
 from typing import Dict, Any, List, Optional, Tuple
 from utils.binary_reader import BinaryReader
 from core.wal_parser import XLogRecord
 
+# 元组头部: t_xmin, t_xmax, t_cid, t_xmin_committed, t_xmax_committed,
+# t_infomask2, t_infomask, t_hoff
+_HEAP_TUPLE_HEADER = struct.Struct('<IIIBBHHB')
+
+# 记录主数据前缀: INSERT为块号、偏移量，DELETE/UPDATE另有最新的xmax，
+# MULTI_INSERT为标志、块号、元组数量
+_INSERT_HEADER = struct.Struct('<IH')
+_DELETE_UPDATE_HEADER = struct.Struct('<IHI')
+_MULTI_INSERT_HEADER = struct.Struct('<BIH')
+
+# 系统表OID -> 表名
+_CATALOG_TABLES = {
+    1247: 'pg_class',      # pg_class OID
+    1249: 'pg_attribute',  # pg_attribute OID
+    1255: 'pg_proc',       # pg_proc OID
+    1260: 'pg_type',       # pg_type OID
+    1261: 'pg_constraint', # pg_constraint OID
+    1262: 'pg_inherits',   # pg_inherits OID
+    2396: 'pg_trigger',    # pg_trigger OID
+    2609: 'pg_description', # pg_description OID
+    2606: 'pg_index',      # pg_index OID
+    2611: 'pg_depend',     # pg_depend OID
+    2612: 'pg_db_role_setting', # pg_db_role_setting OID
+    2964: 'pg_auth_members', # pg_auth_members OID
+    3455: 'pg_shdepend',   # pg_shdepend OID
+    3592: 'pg_shseclabel', # pg_shseclabel OID
+    3786: 'pg_extension',  # pg_extension OID
+    3079: 'pg_enum',       # pg_enum OID
+    2836: 'pg_authid',     # pg_authid OID
+    1213: 'pg_tablespace', # pg_tablespace OID
+    1214: 'pg_database',   # pg_database OID
+    6100: 'pg_replication_origin', # pg_replication_origin OID
+    6000: 'pg_replication_slot', # pg_replication_slot OID
+    6001: 'pg_replication_slot', # pg_replication_slot OID
+    6002: 'pg_replication_slot', # pg_replication_slot OID
+    6003: 'pg_replication_slot', # pg_replication_slot OID
+    6004: 'pg_replication_slot', # pg_replication_slot OID
+    6005: 'pg_replication_slot', # pg_replication_slot OID
+    6006: 'pg_replication_slot', # pg_replication_slot OID
+    6007: 'pg_replication_slot', # pg_replication_slot OID
+    6008: 'pg_replication_slot', # pg_replication_slot OID
+    6009: 'pg_replication_slot', # pg_replication_slot OID
+    6010: 'pg_replication_slot', # pg_replication_slot OID
+}
+
+# 系统表元组的解析结果模板，解析方法返回其副本
+_PG_CLASS_TEMPLATE = {
+    'relname': 'table_name',
+    'relnamespace': 2200,
+    'reltype': 0,
+    'reloftype': 0,
+    'relowner': 10,
+    'relam': 0,
+    'relfilenode': 0,
+    'reltablespace': 0,
+    'relpages': 0,
+    'reltuples': 0,
+    'relallvisible': 0,
+    'reltoastrelid': 0,
+    'relhasindex': False,
+    'relisshared': False,
+    'relpersistence': 'p',
+    'relkind': 'r',
+    'relnatts': 0,
+    'relchecks': 0,
+    'relhasrules': False,
+    'relhastriggers': False,
+    'relhassubclass': False,
+    'relrowsecurity': False,
+    'relforcerowsecurity': False,
+    'relispopulated': True,
+    'relreplident': 'n',
+    'relfrozenxid': 0,
+    'relminmxid': 0
+}
+
+_PG_ATTRIBUTE_TEMPLATE = {
+    'attrelid': 0,
+    'attname': 'column_name',
+    'atttypid': 0,
+    'attstattarget': 0,
+    'attlen': 0,
+    'attnum': 0,
+    'attndims': 0,
+    'attcacheoff': -1,
+    'atttypmod': -1,
+    'attbyval': False,
+    'attstorage': 'p',
+    'attalign': 'i',
+    'attnotnull': False,
+    'atthasdef': False,
+    'atthasmissing': False,
+    'attidentity': '',
+    'attgenerated': '',
+    'attisdropped': False,
+    'attislocal': True,
+    'attinhcount': 0,
+    'attcollation': 0
+}
+
+_PG_TYPE_TEMPLATE = {
+    'typname': 'type_name',
+    'typnamespace': 2200,
+    'typowner': 10,
+    'typlen': 0,
+    'typbyval': False,
+    'typtype': 'b',
+    'typcategory': 'U',
+    'typispreferred': False,
+    'typisdefined': True,
+    'typdelim': ',',
+    'typrelid': 0,
+    'typelem': 0,
+    'typarray': 0,
+    'typinput': 0,
+    'typoutput': 0,
+    'typreceive': 0,
+    'typsend': 0,
+    'typmodin': 0,
+    'typmodout': 0,
+    'typanalyze': 0,
+    'typalign': 'i',
+    'typstorage': 'p',
+    'typnotnull': False,
+    'typbasetype': 0,
+    'typtypmod': -1,
+    'typndims': 0,
+    'typcollation': 0
+}
+
+# VACUUM相关记录的固定解析结果，解析方法返回其副本
+_FREEZE_RESULT = {
+    'operation': 'freeze',
+    'description': 'VACUUM FREEZE operation'
+}
+_CLEAN_RESULT = {
+    'operation': 'clean',
+    'description': 'VACUUM CLEAN operation'
+}
+_VISIBLE_RESULT = {
+    'operation': 'visible',
+    'description': 'VACUUM visibility marking operation'
+}
+
+
+@lru_cache(maxsize=256)
+def _offset_array_struct(count: int) -> struct.Struct:
+    """按元素个数缓存多行INSERT偏移量数组的结构体格式"""
+    return struct.Struct(f'<{count}H')
+
 
 class HeapTupleData:
     """
     Heap元组数据结构
     """
     
+    __slots__ = ('t_xmin', 't_xmax', 't_cid', 't_xmin_committed', 't_xmax_committed',
+                 't_infomask2', 't_infomask', 't_hoff', 't_bits', 'data_start', 'data_length')
+    
     def __init__(self, reader: BinaryReader):
         """
         从二进制数据中解析Heap元组
@@ -21,21 +175,23 @@ class HeapTupleData:
         Args:
             reader: 二进制数据读取器
         """
-        self.t_xmin = reader.read_uint32()      # 插入事务ID
-        self.t_xmax = reader.read_uint32()      # 删除事务ID
-        self.t_cid = reader.read_uint32()       # 命令ID
-        self.t_xmin_committed = reader.read_uint8()  # xmin提交状态
-        self.t_xmax_committed = reader.read_uint8()  # xmax提交状态
-        self.t_infomask2 = reader.read_uint16()  # 信息掩码2
-        self.t_infomask = reader.read_uint16()   # 信息掩码
-        self.t_hoff = reader.read_uint8()        # 头部偏移量
-        self.t_bits = None                       # NULL位图
+        # 定长头部一次解包
+        (self.t_xmin,             # 插入事务ID
+         self.t_xmax,             # 删除事务ID
+         self.t_cid,              # 命令ID
+         self.t_xmin_committed,   # xmin提交状态
+         self.t_xmax_committed,   # xmax提交状态
+         self.t_infomask2,        # 信息掩码2
+         self.t_infomask,         # 信息掩码
+         self.t_hoff,             # 头部偏移量
+         ) = reader.read_struct(_HEAP_TUPLE_HEADER)
+        self.t_bits = None        # NULL位图
         
         # 解析NULL位图（如果存在）
         if self.t_infomask & 0x0001:  # HEAP_HASNULL
-            bit_len = (self.t_hoff - (23 + 1)) * 8  # 计算位图长度
-            if bit_len > 0:
-                self.t_bits = reader.read_bytes((bit_len + 7) // 8)
+            bit_bytes = self.t_hoff - (23 + 1)  # 位图字节数
+            if bit_bytes > 0:
+                self.t_bits = reader.read_bytes(bit_bytes)
         
         # 元组数据从t_hoff位置开始
         self.data_start = reader.tell()
@@ -47,6 +203,8 @@ class HeapInsertInfo:
     Heap插入操作信息
     """
     
+    __slots__ = ('table_oid', 'table_name', 'schema_name', 'columns', 'values', 'is_catalog_update')
+    
     def __init__(self):
         self.table_oid = 0          # 表OID
         self.table_name = ""        # 表名
@@ -61,6 +219,8 @@ class HeapDeleteInfo:
     Heap删除操作信息
     """
     
+    __slots__ = ('table_oid', 'table_name', 'schema_name', 'where_conditions', 'is_catalog_update')
+    
     def __init__(self):
         self.table_oid = 0          # 表OID
         self.table_name = ""        # 表名
@@ -74,6 +234,9 @@ class HeapUpdateInfo:
     Heap更新操作信息
     """
     
+    __slots__ = ('table_oid', 'table_name', 'schema_name', 'old_values', 'new_values',
+                 'where_conditions', 'is_catalog_update', 'is_hot_update')
+    
     def __init__(self):
         self.table_oid = 0          # 表OID
         self.table_name = ""        # 表名
@@ -108,39 +271,11 @@ class HeapParser:
         """
         初始化Heap解析器
         """
-        self.catalog_tables = {
-            1247: 'pg_class',      # pg_class OID
-            1249: 'pg_attribute',  # pg_attribute OID
-            1255: 'pg_proc',       # pg_proc OID
-            1260: 'pg_type',       # pg_type OID
-            1261: 'pg_constraint', # pg_constraint OID
-            1262: 'pg_inherits',   # pg_inherits OID
-            2396: 'pg_trigger',    # pg_trigger OID
-            2609: 'pg_description', # pg_description OID
-            2606: 'pg_index',      # pg_index OID
-            2611: 'pg_depend',     # pg_depend OID
-            2612: 'pg_db_role_setting', # pg_db_role_setting OID
-            2964: 'pg_auth_members', # pg_auth_members OID
-            3455: 'pg_shdepend',   # pg_shdepend OID
-            3592: 'pg_shseclabel', # pg_shseclabel OID
-            3786: 'pg_extension',  # pg_extension OID
-            3079: 'pg_enum',       # pg_enum OID
-            2836: 'pg_authid',     # pg_authid OID
-            1213: 'pg_tablespace', # pg_tablespace OID
-            1214: 'pg_database',   # pg_database OID
-            6100: 'pg_replication_origin', # pg_replication_origin OID
-            6000: 'pg_replication_slot', # pg_replication_slot OID
-            6001: 'pg_replication_slot', # pg_replication_slot OID
-            6002: 'pg_replication_slot', # pg_replication_slot OID
-            6003: 'pg_replication_slot', # pg_replication_slot OID
-            6004: 'pg_replication_slot', # pg_replication_slot OID
-            6005: 'pg_replication_slot', # pg_replication_slot OID
-            6006: 'pg_replication_slot', # pg_replication_slot OID
-            6007: 'pg_replication_slot', # pg_replication_slot OID
-            6008: 'pg_replication_slot', # pg_replication_slot OID
-            6009: 'pg_replication_slot', # pg_replication_slot OID
-            6010: 'pg_replication_slot', # pg_replication_slot OID
-        }
+        # 系统表OID映射，所有实例共享同一份只读数据
+        self.catalog_tables = _CATALOG_TABLES
+        
+        # 各解析方法复用的读取器，解析方法不可重入
+        self._reader = BinaryReader(b'')
     
     def parse_heap_record(self, record: XLogRecord) -> Dict[str, Any]:
         """
@@ -152,18 +287,12 @@ class HeapParser:
         Returns:
             解析结果字典
         """
-        info = record.get_info()
+        info = record.info
         
-        if info == self.XLOG_HEAP_INSERT:
-            return self._parse_insert(record)
-        elif info == self.XLOG_HEAP_DELETE:
-            return self._parse_delete(record)
-        elif info == self.XLOG_HEAP_UPDATE:
-            return self._parse_update(record)
-        elif info == self.XLOG_HEAP_HOT_UPDATE:
-            return self._parse_hot_update(record)
-        else:
-            return {'operation': 'unknown', 'info': info}
+        method_name = self._HEAP_OPS.get(info)
+        if method_name is not None:
+            return getattr(self, method_name)(record)
+        return {'operation': 'unknown', 'info': info}
     
     def parse_heap2_record(self, record: XLogRecord) -> Dict[str, Any]:
         """
@@ -175,18 +304,12 @@ class HeapParser:
         Returns:
             解析结果字典
         """
-        info = record.get_info()
+        info = record.info
         
-        if info == self.XLOG_HEAP2_MULTI_INSERT:
-            return self._parse_multi_insert(record)
-        elif info == self.XLOG_HEAP2_FREEZE:
-            return self._parse_freeze(record)
-        elif info == self.XLOG_HEAP2_CLEAN:
-            return self._parse_clean(record)
-        elif info == self.XLOG_HEAP2_VISIBLE:
-            return self._parse_visible(record)
-        else:
-            return {'operation': 'unknown_heap2', 'info': info}
+        method_name = self._HEAP2_OPS.get(info)
+        if method_name is not None:
+            return getattr(self, method_name)(record)
+        return {'operation': 'unknown_heap2', 'info': info}
     
     def _parse_insert(self, record: XLogRecord) -> Dict[str, Any]:
         """
@@ -201,13 +324,11 @@ class HeapParser:
         if not record.main_data:
             return {'operation': 'insert', 'error': 'no_main_data'}
         
-        reader = BinaryReader(record.main_data)
+        reader = self._reader
+        reader.reset(record.main_data)
         
-        # 读取块号
-        block_num = reader.read_uint32()
-        
-        # 读取偏移量
-        offset_num = reader.read_uint16()
+        # 读取块号和偏移量
+        block_num, offset_num = reader.read_struct(_INSERT_HEADER)
         
         # 读取元组数据
         tuple_data = self._parse_tuple_data(reader)
@@ -239,16 +360,11 @@ class HeapParser:
         if not record.main_data:
             return {'operation': 'delete', 'error': 'no_main_data'}
         
-        reader = BinaryReader(record.main_data)
-        
-        # 读取块号
-        block_num = reader.read_uint32()
+        reader = self._reader
+        reader.reset(record.main_data)
         
-        # 读取偏移量
-        offset_num = reader.read_uint16()
-        
-        # 读取最新的xmax
-        latest_xmax = reader.read_uint32()
+        # 读取块号、偏移量和最新的xmax
+        block_num, offset_num, latest_xmax = reader.read_struct(_DELETE_UPDATE_HEADER)
         
         # 提取表信息
         table_info = self._extract_table_info(record)
@@ -278,16 +394,11 @@ class HeapParser:
         if not record.main_data:
             return {'operation': 'update', 'error': 'no_main_data'}
         
-        reader = BinaryReader(record.main_data)
-        
-        # 读取块号
-        block_num = reader.read_uint32()
-        
-        # 读取偏移量
-        offset_num = reader.read_uint16()
+        reader = self._reader
+        reader.reset(record.main_data)
         
-        # 读取最新的xmax
-        latest_xmax = reader.read_uint32()
+        # 读取块号、偏移量和最新的xmax
+        block_num, offset_num, latest_xmax = reader.read_struct(_DELETE_UPDATE_HEADER)
         
         # 读取新元组数据
         new_tuple_data = self._parse_tuple_data(reader)
@@ -339,36 +450,25 @@ class HeapParser:
         if not record.main_data:
             return {'operation': 'multi_insert', 'error': 'no_main_data'}
         
-        reader = BinaryReader(record.main_data)
-        
-        # 读取标志
-        flags = reader.read_uint8()
-        
-        # 读取块号
-        block_num = reader.read_uint32()
+        reader = self._reader
+        reader.reset(record.main_data)
         
-        # 读取元组数量
-        ntuples = reader.read_uint16()
+        # 读取标志、块号和元组数量
+        flags, block_num, ntuples = reader.read_struct(_MULTI_INSERT_HEADER)
         
-        # 读取偏移量数组
-        offsets = []
-        for i in range(ntuples):
-            offsets.append(reader.read_uint16())
+        # 一次读取整个偏移量数组
+        offsets = list(reader.read_struct(_offset_array_struct(ntuples)))
         
         # 读取每个元组的数据
-        tuples = []
-        for i in range(ntuples):
-            tuple_data = self._parse_tuple_data(reader)
-            tuples.append(tuple_data)
+        parse_tuple_data = self._parse_tuple_data
+        tuples = [parse_tuple_data(reader) for _ in range(ntuples)]
         
         # 提取表信息
         table_info = self._extract_table_info(record)
         
         # 提取所有行的值
-        rows_values = []
-        for tuple_data in tuples:
-            values = self._extract_tuple_values(tuple_data, table_info)
-            rows_values.append(values)
+        extract_tuple_values = self._extract_tuple_values
+        rows_values = [extract_tuple_values(tuple_data, table_info) for tuple_data in tuples]
         
         return {
             'operation': 'multi_insert',
@@ -389,10 +489,7 @@ class HeapParser:
         Returns:
             FREEZE操作信息
         """
-        return {
-            'operation': 'freeze',
-            'description': 'VACUUM FREEZE operation'
-        }
+        return _FREEZE_RESULT.copy()
     
     def _parse_clean(self, record: XLogRecord) -> Dict[str, Any]:
         """
@@ -404,10 +501,7 @@ class HeapParser:
         Returns:
             CLEAN操作信息
         """
-        return {
-            'operation': 'clean',
-            'description': 'VACUUM CLEAN operation'
-        }
+        return _CLEAN_RESULT.copy()
     
     def _parse_visible(self, record: XLogRecord) -> Dict[str, Any]:
         """
@@ -419,10 +513,7 @@ class HeapParser:
         Returns:
             VISIBLE操作信息
         """
-        return {
-            'operation': 'visible',
-            'description': 'VACUUM visibility marking operation'
-        }
+        return _VISIBLE_RESULT.copy()
     
     def _parse_tuple_data(self, reader: BinaryReader) -> HeapTupleData:
         """
@@ -456,19 +547,21 @@ class HeapParser:
         # 从块信息中提取关系文件节点
         if record.blocks:
             block = record.blocks[0]
-            if 'relfilenode' in block:
-                relnode = block['relfilenode']
+            relnode = block.relfilenode
+            if relnode is not None:
                 table_info['relfilenode'] = relnode
                 
                 # 检查是否是系统表
-                if relnode['relNode'] in self.catalog_tables:
-                    table_info['oid'] = relnode['relNode']
-                    table_info['name'] = self.catalog_tables[relnode['relNode']]
+                rel_oid = relnode.relNode
+                catalog_name = self.catalog_tables.get(rel_oid)
+                if catalog_name is not None:
+                    table_info['oid'] = rel_oid
+                    table_info['name'] = catalog_name
                     table_info['schema'] = 'pg_catalog'
                     table_info['is_catalog'] = True
                 else:
                     # 用户表，这里简化处理
-                    table_info['name'] = f'user_table_{relnode["relNode"]}'
+                    table_info['name'] = f'user_table_{rel_oid}'
         
         return table_info
     
@@ -519,7 +612,10 @@ class HeapParser:
             WHERE条件列表
         """
         # 简化实现，实际需要根据主键或唯一索引生成
-        return [f"ctid = '({record.blocks[0]['block_num']},{offset_num})'"]
+        blocks = record.blocks
+        if not blocks:
+            return []
+        return [f"ctid = '({blocks[0].block_num},{offset_num})'"]
     
     def _parse_pg_class_tuple(self, tuple_data: HeapTupleData) -> Dict[str, Any]:
         """
@@ -532,35 +628,7 @@ class HeapParser:
             pg_class字段值
         """
         # 简化实现，实际需要根据pg_class表结构解析
-        return {
-            'relname': 'table_name',
-            'relnamespace': 2200,
-            'reltype': 0,
-            'reloftype': 0,
-            'relowner': 10,
-            'relam': 0,
-            'relfilenode': 0,
-            'reltablespace': 0,
-            'relpages': 0,
-            'reltuples': 0,
-            'relallvisible': 0,
-            'reltoastrelid': 0,
-            'relhasindex': False,
-            'relisshared': False,
-            'relpersistence': 'p',
-            'relkind': 'r',
-            'relnatts': 0,
-            'relchecks': 0,
-            'relhasrules': False,
-            'relhastriggers': False,
-            'relhassubclass': False,
-            'relrowsecurity': False,
-            'relforcerowsecurity': False,
-            'relispopulated': True,
-            'relreplident': 'n',
-            'relfrozenxid': 0,
-            'relminmxid': 0
-        }
+        return _PG_CLASS_TEMPLATE.copy()
     
     def _parse_pg_attribute_tuple(self, tuple_data: HeapTupleData) -> Dict[str, Any]:
         """
@@ -572,29 +640,7 @@ class HeapParser:
         Returns:
             pg_attribute字段值
         """
-        return {
-            'attrelid': 0,
-            'attname': 'column_name',
-            'atttypid': 0,
-            'attstattarget': 0,
-            'attlen': 0,
-            'attnum': 0,
-            'attndims': 0,
-            'attcacheoff': -1,
-            'atttypmod': -1,
-            'attbyval': False,
-            'attstorage': 'p',
-            'attalign': 'i',
-            'attnotnull': False,
-            'atthasdef': False,
-            'atthasmissing': False,
-            'attidentity': '',
-            'attgenerated': '',
-            'attisdropped': False,
-            'attislocal': True,
-            'attinhcount': 0,
-            'attcollation': 0
-        }
+        return _PG_ATTRIBUTE_TEMPLATE.copy()
     
     def _parse_pg_type_tuple(self, tuple_data: HeapTupleData) -> Dict[str, Any]:
         """
@@ -606,32 +652,19 @@ class HeapParser:
         Returns:
             pg_type字段值
         """
-        return {
-            'typname': 'type_name',
-            'typnamespace': 2200,
-            'typowner': 10,
-            'typlen': 0,
-            'typbyval': False,
-            'typtype': 'b',
-            'typcategory': 'U',
-            'typispreferred': False,
-            'typisdefined': True,
-            'typdelim': ',',
-            'typrelid': 0,
-            'typelem': 0,
-            'typarray': 0,
-            'typinput': 0,
-            'typoutput': 0,
-            'typreceive': 0,
-            'typsend': 0,
-            'typmodin': 0,
-            'typmodout': 0,
-            'typanalyze': 0,
-            'typalign': 'i',
-            'typstorage': 'p',
-            'typnotnull': False,
-            'typbasetype': 0,
-            'typtypmod': -1,
-            'typndims': 0,
-            'typcollation': 0
-        }
\ No newline at end of file
+        return _PG_TYPE_TEMPLATE.copy()
+    
+    # 各记录类型的info -> 解析方法名，按名称在实例上查找，子类重写的方法同样生效
+    _HEAP_OPS = {
+        XLOG_HEAP_INSERT: '_parse_insert',          # INSERT
+        XLOG_HEAP_DELETE: '_parse_delete',          # DELETE
+        XLOG_HEAP_UPDATE: '_parse_update',          # UPDATE
+        XLOG_HEAP_HOT_UPDATE: '_parse_hot_update',  # HOT UPDATE
+    }
+    
+    _HEAP2_OPS = {
+        XLOG_HEAP2_MULTI_INSERT: '_parse_multi_insert',  # MULTI_INSERT
+        XLOG_HEAP2_FREEZE: '_parse_freeze',              # FREEZE
+        XLOG_HEAP2_CLEAN: '_parse_clean',                # CLEAN
+        XLOG_HEAP2_VISIBLE: '_parse_visible',            # VISIBLE
+    }
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+事务管理器测试
+"""
+
+import unittest
+
+from core.transaction_manager import TransactionInfo, TransactionManager, TransactionState
+
+
+class AddSubtransactionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = TransactionManager()
+
+    def test_existing_subtransaction_keeps_its_parent(self):
+        self.manager.add_subtransaction(100, 101)
+        self.manager.add_subtransaction(200, 101)
+
+        self.assertEqual(self.manager.transactions[101].parent_xid, 100)
+        self.assertEqual(self.manager.get_parent_transaction(101), 200)
+
+    def test_finished_subtransaction_is_left_alone(self):
+        self.manager.add_subtransaction(100, 101)
+        subtransaction = self.manager.transactions[101]
+        subtransaction.state = TransactionState.COMMITTED
+
+        self.manager.add_subtransaction(200, 101)
+
+        self.assertIs(self.manager.transactions[101], subtransaction)
+        self.assertEqual(subtransaction.state, TransactionState.COMMITTED)
+
+    def test_links_into_finished_parent(self):
+        self.manager.add_subtransaction(1, 100)
+        parent = self.manager.transactions[100]
+        parent.state = TransactionState.COMMITTED
+
+        self.manager.add_subtransaction(100, 101)
+
+        self.assertIn(101, parent.subtransactions)
+        self.assertIs(parent.subtransaction_objs[0], self.manager.transactions[101])
+
+
+class TransactionInfoTest(unittest.TestCase):
+
+    def test_compares_by_value(self):
+        self.assertEqual(TransactionInfo(5), TransactionInfo(5))
+        self.assertNotEqual(TransactionInfo(5), TransactionInfo(5, parent_xid=1))
+
+    def test_repr_lists_fields(self):
+        self.assertTrue(repr(TransactionInfo(5)).startswith("TransactionInfo(xid=5, state="))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+WAL文件解析器测试
+"""
+
+import os
+import struct
+import tempfile
+import unittest
+
+from core.wal_parser import WALFile, XLogRecord
+
+
+BLOCK_SIZE = WALFile.WAL_BLOCK_SIZE
+
+
+def _write_wal(pages):
+    """
+    构造一个WAL文件：文件头占第一页，之后每页写入页头和给定的记录
+
+    Args:
+        pages: 每页的记录列表，记录为(xl_tot_len, xl_xid, xl_rmid)，页内其余部分为零
+
+    Returns:
+        临时文件路径
+    """
+    data = bytearray(BLOCK_SIZE * (len(pages) + 1))
+    struct.pack_into('<QIII', data, 0, 1, WALFile.WAL_SEGMENT_SIZE, BLOCK_SIZE, WALFile.WAL_SEGMENT_SIZE)
+    for page_no, records in enumerate(pages, start=1):
+        pos = page_no * BLOCK_SIZE
+        struct.pack_into('<HHIQQ', data, pos, WALFile.XLOG_PAGE_MAGIC, 0, 1, 0, 0)
+        pos += 24
+        for tot_len, xid, rmid in records:
+            struct.pack_into('<IIQBBxxI', data, pos, tot_len, xid, 0, 0, rmid, 0)
+            pos += tot_len
+    fd, path = tempfile.mkstemp(suffix='.wal')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    return path
+
+
+class WALFileTest(unittest.TestCase):
+
+    def _parse(self, pages):
+        path = _write_wal(pages)
+        self.addCleanup(os.remove, path)
+        with WALFile(path, headers_only=True) as wal_file:
+            wal_file.parse()
+            return wal_file.records
+
+    def test_zero_filled_page_tail_is_not_a_record(self):
+        records = self._parse([[(40, 7, 10), (32, 7, 10)], [(40, 8, 1)]])
+
+        self.assertEqual([r.xl_xid for r in records], [7, 7, 8])
+        self.assertTrue(all(r.xl_tot_len >= XLogRecord.SIZEOF_XLOG_RECORD for r in records))
+
+    def test_bad_length_resumes_at_next_page(self):
+        records = self._parse([[(40, 7, 10), (0xFFFFFFFF, 9, 10)], [(40, 8, 10)]])
+
+        self.assertEqual([r.xl_xid for r in records], [7, 8])
+
+
+if __name__ == '__main__':
+    unittest.main()
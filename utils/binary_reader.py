@@ -6,6 +6,46 @@
 import struct
 from typing import Union, Tuple, Optional
 
+# 定长整数的预编译解包函数（小端序）
+_U16_UNPACK_FROM = struct.Struct('<H').unpack_from
+_U32_UNPACK_FROM = struct.Struct('<I').unpack_from
+_U64_UNPACK_FROM = struct.Struct('<Q').unpack_from
+_I32_UNPACK_FROM = struct.Struct('<i').unpack_from
+_I64_UNPACK_FROM = struct.Struct('<q').unpack_from
+
+# 在memoryview中查找结束符时首次拷贝的字节数，之后每次翻倍
+_NUL_SCAN_CHUNK = 64
+
+
+def _find_nul(view: memoryview, start: int) -> int:
+    """
+    在memoryview中从start开始查找空字符
+    
+    视图覆盖整个底层对象（如bytes、mmap）时直接在底层对象上查找；
+    否则按倍增的窗口分段拷贝查找，拷贝量与字符串长度成正比，而不是与剩余数据长度成正比。
+    
+    Args:
+        view: 数据视图
+        start: 起始位置
+        
+    Returns:
+        空字符的位置，未找到时返回-1
+    """
+    base = view.obj
+    if view.nbytes == len(base) and view.c_contiguous and hasattr(base, 'find'):
+        return base.find(b'\x00', start)
+    
+    length = len(view)
+    chunk = _NUL_SCAN_CHUNK
+    while start < length:
+        stop = min(start + chunk, length)
+        end = bytes(view[start:stop]).find(b'\x00')
+        if end >= 0:
+            return start + end
+        start = stop
+        chunk <<= 1
+    return -1
+
 
 class BinaryReader:
     """
@@ -24,6 +64,17 @@ class BinaryReader:
         self.position = 0
         self.length = len(data)
     
+    def reset(self, data: bytes) -> None:
+        """
+        切换到新的二进制数据并回到起始位置，以便复用读取器
+        
+        Args:
+            data: 二进制数据
+        """
+        self.data = data
+        self.position = 0
+        self.length = len(data)
+    
     def read_bytes(self, count: int) -> bytes:
         """
         读取指定数量的字节
@@ -38,12 +89,24 @@ class BinaryReader:
             EOFError: 如果到达文件末尾
         """
         if self.position + count > self.length:
-            raise EOFError(f"尝试读取{count}字节，但只剩{self.length - self.position}字节")
+            self._raise_eof(count)
         
         result = self.data[self.position:self.position + count]
         self.position += count
         return result
     
+    def _raise_eof(self, count: int) -> None:
+        """
+        抛出读取越界错误，读取位置保持不变
+        
+        Args:
+            count: 尝试读取的字节数
+            
+        Raises:
+            EOFError: 总是抛出
+        """
+        raise EOFError(f"尝试读取{count}字节，但只剩{self.length - self.position}字节")
+    
     def read_uint8(self) -> int:
         """
         读取无符号8位整数
@@ -51,8 +114,11 @@ class BinaryReader:
         Returns:
             读取的整数值
         """
-        data = self.read_bytes(1)
-        return struct.unpack('<B', data)[0]
+        pos = self.position
+        if pos >= self.length:
+            self._raise_eof(1)
+        self.position = pos + 1
+        return self.data[pos]
     
     def read_uint16(self) -> int:
         """
@@ -61,8 +127,11 @@ class BinaryReader:
         Returns:
             读取的整数值
         """
-        data = self.read_bytes(2)
-        return struct.unpack('<H', data)[0]
+        pos = self.position
+        if pos + 2 > self.length:
+            self._raise_eof(2)
+        self.position = pos + 2
+        return _U16_UNPACK_FROM(self.data, pos)[0]
     
     def read_uint32(self) -> int:
         """
@@ -71,8 +140,11 @@ class BinaryReader:
         Returns:
             读取的整数值
         """
-        data = self.read_bytes(4)
-        return struct.unpack('<I', data)[0]
+        pos = self.position
+        if pos + 4 > self.length:
+            self._raise_eof(4)
+        self.position = pos + 4
+        return _U32_UNPACK_FROM(self.data, pos)[0]
     
     def read_uint64(self) -> int:
         """
@@ -81,8 +153,11 @@ class BinaryReader:
         Returns:
             读取的整数值
         """
-        data = self.read_bytes(8)
-        return struct.unpack('<Q', data)[0]
+        pos = self.position
+        if pos + 8 > self.length:
+            self._raise_eof(8)
+        self.position = pos + 8
+        return _U64_UNPACK_FROM(self.data, pos)[0]
     
     def read_int32(self) -> int:
         """
@@ -91,8 +166,11 @@ class BinaryReader:
         Returns:
             读取的整数值
         """
-        data = self.read_bytes(4)
-        return struct.unpack('<i', data)[0]
+        pos = self.position
+        if pos + 4 > self.length:
+            self._raise_eof(4)
+        self.position = pos + 4
+        return _I32_UNPACK_FROM(self.data, pos)[0]
     
     def read_int64(self) -> int:
         """
@@ -101,8 +179,32 @@ class BinaryReader:
         Returns:
             读取的整数值
         """
-        data = self.read_bytes(8)
-        return struct.unpack('<q', data)[0]
+        pos = self.position
+        if pos + 8 > self.length:
+            self._raise_eof(8)
+        self.position = pos + 8
+        return _I64_UNPACK_FROM(self.data, pos)[0]
+    
+    def read_struct(self, fmt: struct.Struct) -> Tuple:
+        """
+        按预编译的结构体格式一次性读取多个字段
+        
+        Args:
+            fmt: 预编译的struct.Struct对象
+            
+        Returns:
+            解包后的字段元组
+            
+        Raises:
+            EOFError: 如果到达文件末尾
+        """
+        size = fmt.size
+        if self.position + size > self.length:
+            self._raise_eof(size)
+        
+        result = fmt.unpack_from(self.data, self.position)
+        self.position += size
+        return result
     
     def read_string(self, length: int, encoding: str = 'utf-8') -> str:
         """
@@ -130,16 +232,22 @@ class BinaryReader:
         Returns:
             读取的字符串
         """
-        result = b''
-        while True:
-            if self.position >= self.length:
-                break
-            byte = self.read_bytes(1)
-            if byte == b'\x00':
-                break
-            result += byte
+        data = self.data
+        start = self.position
+        if isinstance(data, memoryview):
+            # memoryview没有find方法
+            end = _find_nul(data, start)
+        else:
+            end = data.find(b'\x00', start)
+        
+        if end < 0:
+            # 没有结束符时读到末尾
+            end = self.length
+            self.position = end
+        else:
+            self.position = end + 1
         
-        return result.decode(encoding, errors='ignore')
+        return str(data[start:end], encoding, errors='ignore')
     
     def peek_bytes(self, count: int) -> bytes:
         """
@@ -0,0 +1,57 @@
+"""
+CRC-32C（Castagnoli）校验工具
+PostgreSQL使用CRC-32C校验WAL记录
+"""
+
+try:
+    # crc32c包使用SSE 4.2 / ARMv8 CRC指令进行硬件加速
+    from crc32c import crc32c as _hw_crc32c
+except ImportError:
+    _hw_crc32c = None
+
+
+# CRC-32C反射多项式
+_CRC32C_POLY = 0x82F63B78
+
+
+def _build_table():
+    """
+    构建按字节查表的CRC-32C表
+    """
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ _CRC32C_POLY if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC32C_TABLE = _build_table()
+
+
+def _sw_crc32c(data, value: int = 0) -> int:
+    """
+    纯Python查表实现的CRC-32C，在未安装crc32c包时使用
+    """
+    table = _CRC32C_TABLE
+    crc = value ^ 0xFFFFFFFF
+    for byte in bytes(data):
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+def crc32c(data, value: int = 0) -> int:
+    """
+    计算CRC-32C校验值
+    
+    Args:
+        data: 支持缓冲区协议的数据
+        value: 之前数据的CRC值，用于分段连续计算
+        
+    Returns:
+        32位CRC值
+    """
+    if _hw_crc32c is not None:
+        return _hw_crc32c(data, value)
+    return _sw_crc32c(data, value)
@@ -6,12 +6,34 @@ LSN（Log Sequence Number）工具函数
 from typing import Tuple, Union
 
 
+def parse_lsn(lsn_str: str) -> int:
+    """
+    将"高32位/低32位"格式的LSN字符串转换为64位整数
+    
+    Args:
+        lsn_str: 字符串格式的LSN，如"0/16B37B0"
+        
+    Returns:
+        64位整数格式的LSN
+    """
+    high_str, sep, low_str = lsn_str.partition('/')
+    if not sep:
+        raise ValueError(f"无效的LSN格式: {lsn_str}")
+    
+    high = int(high_str, 16) if high_str else 0
+    low = int(low_str, 16)
+    
+    return (high << 32) | low
+
+
 class LSN:
     """
     PostgreSQL LSN（Log Sequence Number）处理类
     LSN是64位值，高32位是日志文件号，低32位是文件内偏移量
     """
     
+    __slots__ = ('value',)
+    
     def __init__(self, value: Union[int, str]):
         """
         初始化LSN
@@ -34,14 +56,7 @@ class LSN:
         Returns:
             64位整数格式的LSN
         """
-        if '/' not in lsn_str:
-            raise ValueError(f"无效的LSN格式: {lsn_str}")
-        
-        high_str, low_str = lsn_str.split('/')
-        high = int(high_str, 16) if high_str else 0
-        low = int(low_str, 16)
-        
-        return (high << 32) | low
+        return parse_lsn(lsn_str)
     
     @property
     def file_id(self) -> int:
@@ -70,7 +85,8 @@ class LSN:
         Returns:
             字符串格式的LSN，如"0/16B37B0"
         """
-        return f"{self.file_id:X}/{self.file_offset:X}"
+        value = self.value
+        return f"{value >> 32:X}/{value & 0xFFFFFFFF:X}"
     
     def __str__(self) -> str:
         return self.to_string()
@@ -89,7 +105,9 @@ class LSN:
         return NotImplemented
     
     def __le__(self, other) -> bool:
-        return self == other or self < other
+        if isinstance(other, LSN):
+            return self.value <= other.value
+        return NotImplemented
     
     def __gt__(self, other) -> bool:
         if isinstance(other, LSN):
@@ -97,7 +115,9 @@ class LSN:
         return NotImplemented
     
     def __ge__(self, other) -> bool:
-        return self == other or self > other
+        if isinstance(other, LSN):
+            return self.value >= other.value
+        return NotImplemented
     
     def __hash__(self) -> int:
         return hash(self.value)
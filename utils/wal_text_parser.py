@@ -4,8 +4,23 @@ WAL文本文件解析器
 """
 
 import re
-from typing import List, Dict, Any, Optional
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter
+from sys import intern
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 from core.wal_parser import get_rmgr_name
+from utils.lsn_utils import parse_lsn
+
+_get_rmgr = attrgetter('rmgr')
+_get_tx_id = attrgetter('tx_id')
+
+# 可能包含DML/DDL操作的资源管理器
+_DML_RMGRS = frozenset(('Heap', 'Heap2'))
+_DDL_RMGRS = frozenset(('Database', 'Tablespace'))
+
+# pg_waldump输出单条记录的行格式，用于按需还原原始文本行
+_RECORD_LINE_FORMAT = 'rmgr: %-11s len (rec/tot): %6d/%6d, tx: %10d, lsn: %s, prev %s, desc: %s'
 
 
 class WALTextRecord:
@@ -13,8 +28,12 @@ class WALTextRecord:
     文本格式的WAL记录
     """
     
+    __slots__ = ('rmgr', 'rmgr_id', 'length', 'total_length', 'tx_id', 'lsn', 'prev_lsn',
+                 'description', '_raw_line', '_description_lower', '_lsn_int', '_prev_lsn_int')
+    
     def __init__(self, rmgr: str, rmgr_id: int, length: int, total_length: int,
-                 tx_id: int, lsn: str, prev_lsn: str, description: str, raw_line: str):
+                 tx_id: int, lsn: str, prev_lsn: str, description: str,
+                 raw_line: Optional[str] = None):
         """
         初始化WAL文本记录
         
@@ -27,7 +46,7 @@ class WALTextRecord:
             lsn: LSN
             prev_lsn: 前一个LSN
             description: 描述信息
-            raw_line: 原始文本行
+            raw_line: 原始文本行，为None时按需由各字段还原
         """
         self.rmgr = rmgr
         self.rmgr_id = rmgr_id
@@ -37,7 +56,174 @@ class WALTextRecord:
         self.lsn = lsn
         self.prev_lsn = prev_lsn
         self.description = description
-        self.raw_line = raw_line
+        self._raw_line = raw_line
+        self._description_lower = None
+        self._lsn_int = None
+        self._prev_lsn_int = None
+    
+    def __reduce__(self):
+        """
+        按构造参数序列化，多进程解析时结果回传更快，缓存字段不随之传递
+        """
+        return (WALTextRecord, (self.rmgr, self.rmgr_id, self.length, self.total_length, self.tx_id,
+                                self.lsn, self.prev_lsn, self.description, self._raw_line))
+    
+    @property
+    def description_lower(self) -> str:
+        """
+        小写的描述信息，首次访问时计算并缓存
+        """
+        value = self._description_lower
+        if value is None:
+            value = self._description_lower = self.description.lower()
+        return value
+    
+    @property
+    def lsn_int(self) -> int:
+        """
+        64位整数形式的LSN，首次访问时解析并缓存，便于排序和范围比较
+        """
+        value = self._lsn_int
+        if value is None:
+            value = self._lsn_int = parse_lsn(self.lsn)
+        return value
+    
+    @property
+    def prev_lsn_int(self) -> int:
+        """
+        64位整数形式的前一个LSN，首次访问时解析并缓存
+        """
+        value = self._prev_lsn_int
+        if value is None:
+            value = self._prev_lsn_int = parse_lsn(self.prev_lsn)
+        return value
+    
+    @property
+    def raw_line(self) -> str:
+        """
+        原始文本行，解析时不再保存，按pg_waldump的输出格式还原
+        """
+        line = self._raw_line
+        if line is None:
+            line = self.reconstruct()
+        return line
+    
+    def reconstruct(self) -> str:
+        """
+        由解析出的字段重建pg_waldump格式的文本行
+        
+        Returns:
+            文本行
+        """
+        return _RECORD_LINE_FORMAT % (self.rmgr, self.length, self.total_length, self.tx_id,
+                                      self.lsn, self.prev_lsn, self.description)
+
+
+class IndexedRecords:
+    """
+    带索引的WAL文本记录集合
+    构建时遍历一遍记录，按资源管理器ID和事务ID建立索引，之后的过滤只需一次字典查找
+    """
+    
+    def __init__(self, records: Iterable[WALTextRecord], rmgr_name_to_id: Dict[str, int]):
+        """
+        初始化并建立索引
+        
+        Args:
+            records: 记录序列，可以是任意可迭代对象
+            rmgr_name_to_id: 资源管理器名称到ID的映射
+        """
+        self.records = list(records)
+        self.rmgr_name_to_id = rmgr_name_to_id
+        
+        by_rmgr_id = defaultdict(list)
+        by_tx_id = defaultdict(list)
+        for record in self.records:
+            by_rmgr_id[record.rmgr_id].append(record)
+            by_tx_id[record.tx_id].append(record)
+        
+        self.by_rmgr_id = dict(by_rmgr_id)
+        self.by_tx_id = dict(by_tx_id)
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def __iter__(self) -> Iterator[WALTextRecord]:
+        return iter(self.records)
+    
+    def filter_by_rmgr(self, rmgr_name: str) -> List[WALTextRecord]:
+        """
+        按资源管理器名称过滤记录
+        
+        Args:
+            rmgr_name: 资源管理器名称
+            
+        Returns:
+            过滤后的记录列表
+        """
+        rmgr_id = self.rmgr_name_to_id.get(rmgr_name)
+        if rmgr_id is not None:
+            return self.filter_by_rmgr_id(rmgr_id)
+        # 未知名称的记录ID都是-1，只需在该分组内按名称比较
+        return [r for r in self.by_rmgr_id.get(-1, ()) if r.rmgr == rmgr_name]
+    
+    def filter_by_rmgr_id(self, rmgr_id: int) -> List[WALTextRecord]:
+        """
+        按资源管理器ID过滤记录
+        
+        Args:
+            rmgr_id: 资源管理器ID
+            
+        Returns:
+            过滤后的记录列表
+        """
+        return list(self.by_rmgr_id.get(rmgr_id, ()))
+    
+    def filter_by_tx_id(self, tx_id: int) -> List[WALTextRecord]:
+        """
+        按事务ID过滤记录
+        
+        Args:
+            tx_id: 事务ID
+            
+        Returns:
+            过滤后的记录列表
+        """
+        return list(self.by_tx_id.get(tx_id, ()))
+    
+    def filter(self, *, rmgr_id: Optional[int] = None, tx_id: Optional[int] = None) -> List[WALTextRecord]:
+        """
+        按资源管理器ID和事务ID同时过滤记录
+        
+        Args:
+            rmgr_id: 资源管理器ID，为None时不过滤
+            tx_id: 事务ID，为None时不过滤
+            
+        Returns:
+            同时满足所有条件的记录列表
+        """
+        if rmgr_id is None:
+            if tx_id is None:
+                return list(self.records)
+            return self.filter_by_tx_id(tx_id)
+        if tx_id is None:
+            return self.filter_by_rmgr_id(rmgr_id)
+        
+        # 两个条件都有时，在较小的分组里检查另一个条件
+        by_rmgr = self.by_rmgr_id.get(rmgr_id, ())
+        by_tx = self.by_tx_id.get(tx_id, ())
+        if len(by_rmgr) <= len(by_tx):
+            return [r for r in by_rmgr if r.tx_id == tx_id]
+        return [r for r in by_tx if r.rmgr_id == rmgr_id]
+    
+    def group_by_transaction(self) -> Dict[int, List[WALTextRecord]]:
+        """
+        按事务分组记录
+        
+        Returns:
+            按事务ID分组的记录字典
+        """
+        return {tx_id: list(group) for tx_id, group in self.by_tx_id.items()}
 
 
 class WALTextParser:
@@ -79,9 +265,10 @@ class WALTextParser:
             'Heap3': 24
         }
         
-        # 正则表达式模式
+        # 正则表达式模式，以字面量rmgr:开头，字段间只允许空格和制表符；
+        # 输入行已去掉首尾空白，描述部分直接取到行尾
         self.record_pattern = re.compile(
-            r'rmgr:\s+(\w+)\s+len\s\(rec/tot\):\s+(\d+)/\s*(\d+),\s+tx:\s*(\d+),\s+lsn:\s+([^,]+),\s+prev\s+([^,]+),\s+desc:\s+(.+)'
+            r'rmgr:[ \t]+(\w+)[ \t]+len \(rec/tot\):[ \t]+(\d+)/[ \t]*(\d+),[ \t]+tx:[ \t]*(\d+),[ \t]+lsn:[ \t]+([^,]+),[ \t]+prev[ \t]+([^,]+),[ \t]+desc:[ \t]+(.*)'
         )
     
     def parse_text_file(self, file_path: str) -> List[WALTextRecord]:
@@ -94,25 +281,76 @@ class WALTextParser:
         Returns:
             解析后的WAL记录列表
         """
+        return list(self.iter_records(file_path))
+    
+    def parse_text_files(self, file_paths: Iterable[str], workers: int = 1) -> List[WALTextRecord]:
+        """
+        解析多个WAL文本文件，结果按文件顺序拼接
+        
+        各文件相互独立，workers大于1时每个文件交给进程池中的一个子进程解析。
+        
+        Args:
+            file_paths: 文本文件路径序列
+            workers: 并行解析使用的进程数
+            
+        Returns:
+            解析后的WAL记录列表
+        """
+        file_paths = list(file_paths)
         records = []
         
+        if workers > 1 and len(file_paths) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(file_paths))) as executor:
+                for file_records in executor.map(self.parse_text_file, file_paths):
+                    records.extend(file_records)
+        else:
+            for file_path in file_paths:
+                records.extend(self.iter_records(file_path))
+        
+        return records
+    
+    def iter_records(self, file_path: str) -> Iterator[WALTextRecord]:
+        """
+        逐条解析WAL文本文件，边读边产出记录，不在内存中保留完整列表
+        
+        出错时打印错误信息并结束迭代，已产出的记录不受影响。
+        
+        Args:
+            file_path: 文本文件路径
+            
+        Yields:
+            解析后的WAL记录
+        """
+        # 循环内用到的方法只取一次
+        parse_line = self._parse_line
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
                     line = line.strip()
                     if not line or line.startswith('#'):
                         continue
                     
-                    record = self._parse_line(line)
+                    record = parse_line(line)
                     if record:
-                        records.append(record)
+                        yield record
                         
         except FileNotFoundError:
             print(f"错误: 文件不存在: {file_path}")
         except Exception as e:
             print(f"解析文件时出错: {e}")
+    
+    def build_index(self, records: Iterable[WALTextRecord]) -> IndexedRecords:
+        """
+        为记录建立按资源管理器ID和事务ID的索引，适合对同一批记录做多次过滤
         
-        return records
+        Args:
+            records: 记录序列，可以是任意可迭代对象
+            
+        Returns:
+            带索引的记录集合
+        """
+        return IndexedRecords(records, self.rmgr_name_to_id)
     
     def _parse_line(self, line: str) -> Optional[WALTextRecord]:
         """
@@ -128,13 +366,10 @@ class WALTextParser:
         if not match:
             return None
         
-        rmgr_name = match.group(1)
-        length = int(match.group(2))
-        total_length = int(match.group(3))
-        tx_id = int(match.group(4))
-        lsn = match.group(5)
-        prev_lsn = match.group(6)
-        description = match.group(7)
+        rmgr_name, length, total_length, tx_id, lsn, prev_lsn, description = match.groups()
+        
+        # 资源管理器名称只有少数几种，驻留后所有记录共享同一个字符串对象
+        rmgr_name = intern(rmgr_name)
         
         # 获取资源管理器ID
         rmgr_id = self.rmgr_name_to_id.get(rmgr_name, -1)
@@ -142,34 +377,75 @@ class WALTextParser:
         return WALTextRecord(
             rmgr=rmgr_name,
             rmgr_id=rmgr_id,
-            length=length,
-            total_length=total_length,
-            tx_id=tx_id,
+            length=int(length),
+            total_length=int(total_length),
+            tx_id=int(tx_id),
             lsn=lsn,
             prev_lsn=prev_lsn,
-            description=description,
-            raw_line=line
+            description=description
         )
     
-    def filter_by_rmgr(self, records: List[WALTextRecord], rmgr_name: str) -> List[WALTextRecord]:
+    def filter(self, records: Iterable[WALTextRecord], *, rmgr: Optional[str] = None,
+               rmgr_id: Optional[int] = None, tx_id: Optional[int] = None) -> List[WALTextRecord]:
+        """
+        按多个条件一次性过滤记录，只遍历一遍，不产生中间列表
+        
+        Args:
+            records: 记录序列，可以是任意可迭代对象
+            rmgr: 资源管理器名称，为None时不过滤
+            rmgr_id: 资源管理器ID，为None时不过滤
+            tx_id: 事务ID，为None时不过滤
+            
+        Returns:
+            同时满足所有条件的记录列表
+        """
+        # 已知名称与ID一一对应，改为比较整数ID
+        if rmgr is not None:
+            known_id = self.rmgr_name_to_id.get(rmgr)
+            if known_id is not None:
+                if rmgr_id is not None and rmgr_id != known_id:
+                    return []
+                rmgr_id = known_id
+                rmgr = None
+        
+        if rmgr is not None:
+            return [r for r in records
+                    if r.rmgr == rmgr
+                    and (rmgr_id is None or r.rmgr_id == rmgr_id)
+                    and (tx_id is None or r.tx_id == tx_id)]
+        
+        # 常见组合各用一个推导式，避免每条记录都判断条件是否为None
+        if rmgr_id is None:
+            if tx_id is None:
+                return list(records)
+            return [r for r in records if r.tx_id == tx_id]
+        if tx_id is None:
+            return [r for r in records if r.rmgr_id == rmgr_id]
+        return [r for r in records if r.rmgr_id == rmgr_id and r.tx_id == tx_id]
+    
+    def filter_by_rmgr(self, records: Iterable[WALTextRecord], rmgr_name: str) -> List[WALTextRecord]:
         """
         按资源管理器名称过滤记录
         
         Args:
-            records: 记录列表
+            records: 记录序列，可以是任意可迭代对象
             rmgr_name: 资源管理器名称
             
         Returns:
             过滤后的记录列表
         """
+        # 已知名称与ID一一对应，改为比较整数ID
+        rmgr_id = self.rmgr_name_to_id.get(rmgr_name)
+        if rmgr_id is not None:
+            return [r for r in records if r.rmgr_id == rmgr_id]
         return [r for r in records if r.rmgr == rmgr_name]
     
-    def filter_by_rmgr_id(self, records: List[WALTextRecord], rmgr_id: int) -> List[WALTextRecord]:
+    def filter_by_rmgr_id(self, records: Iterable[WALTextRecord], rmgr_id: int) -> List[WALTextRecord]:
         """
         按资源管理器ID过滤记录
         
         Args:
-            records: 记录列表
+            records: 记录序列，可以是任意可迭代对象
             rmgr_id: 资源管理器ID
             
         Returns:
@@ -177,12 +453,12 @@ class WALTextParser:
         """
         return [r for r in records if r.rmgr_id == rmgr_id]
     
-    def filter_by_tx_id(self, records: List[WALTextRecord], tx_id: int) -> List[WALTextRecord]:
+    def filter_by_tx_id(self, records: Iterable[WALTextRecord], tx_id: int) -> List[WALTextRecord]:
         """
         按事务ID过滤记录
         
         Args:
-            records: 记录列表
+            records: 记录序列，可以是任意可迭代对象
             tx_id: 事务ID
             
         Returns:
@@ -204,15 +480,11 @@ class WALTextParser:
             return {}
         
         # 按资源管理器统计
-        rmgr_stats = {}
-        for record in records:
-            rmgr_stats[record.rmgr] = rmgr_stats.get(record.rmgr, 0) + 1
+        rmgr_stats = dict(Counter(map(_get_rmgr, records)))
         
-        # 按事务统计
-        tx_stats = {}
-        for record in records:
-            if record.tx_id != 0:  # 排除系统事务
-                tx_stats[record.tx_id] = tx_stats.get(record.tx_id, 0) + 1
+        # 按事务统计，排除系统事务
+        tx_stats = dict(Counter(map(_get_tx_id, records)))
+        tx_stats.pop(0, None)
         
         return {
             'total_records': len(records),
@@ -224,30 +496,28 @@ class WALTextParser:
             }
         }
     
-    def group_by_transaction(self, records: List[WALTextRecord]) -> Dict[int, List[WALTextRecord]]:
+    def group_by_transaction(self, records: Iterable[WALTextRecord]) -> Dict[int, List[WALTextRecord]]:
         """
         按事务分组记录
         
         Args:
-            records: 记录列表
+            records: 记录序列，可以是任意可迭代对象
             
         Returns:
             按事务ID分组的记录字典
         """
-        grouped = {}
+        grouped = defaultdict(list)
         for record in records:
-            if record.tx_id not in grouped:
-                grouped[record.tx_id] = []
             grouped[record.tx_id].append(record)
         
-        return grouped
+        return dict(grouped)
     
-    def find_dml_operations(self, records: List[WALTextRecord]) -> List[WALTextRecord]:
+    def find_dml_operations(self, records: Iterable[WALTextRecord]) -> List[WALTextRecord]:
         """
         查找DML操作记录
         
         Args:
-            records: 记录列表
+            records: 记录序列，可以是任意可迭代对象
             
         Returns:
             DML操作记录列表
@@ -255,20 +525,21 @@ class WALTextParser:
         dml_records = []
         
         for record in records:
-            if record.rmgr in ['Heap', 'Heap2']:
+            if record.rmgr in _DML_RMGRS:
                 # 检查描述中是否包含DML操作
-                desc = record.description.lower()
-                if any(op in desc for op in ['insert', 'update', 'delete', 'multi_insert']):
+                desc = record.description_lower
+                # multi_insert已被insert覆盖
+                if 'insert' in desc or 'update' in desc or 'delete' in desc:
                     dml_records.append(record)
         
         return dml_records
     
-    def find_ddl_operations(self, records: List[WALTextRecord]) -> List[WALTextRecord]:
+    def find_ddl_operations(self, records: Iterable[WALTextRecord]) -> List[WALTextRecord]:
         """
         查找DDL操作记录
         
         Args:
-            records: 记录列表
+            records: 记录序列，可以是任意可迭代对象
             
         Returns:
             DDL操作记录列表
@@ -276,12 +547,12 @@ class WALTextParser:
         ddl_records = []
         
         for record in records:
-            if record.rmgr in ['Database', 'Tablespace']:
+            if record.rmgr in _DDL_RMGRS:
                 ddl_records.append(record)
-            elif record.rmgr in ['Heap', 'Heap2'] and record.tx_id == 0:
+            elif record.rmgr in _DML_RMGRS and record.tx_id == 0:
                 # 系统事务可能是DDL操作
-                desc = record.description.lower()
-                if any(op in desc for op in ['create', 'drop', 'alter']):
+                desc = record.description_lower
+                if 'create' in desc or 'drop' in desc or 'alter' in desc:
                     ddl_records.append(record)
         
         return ddl_records
\ No newline at end of file